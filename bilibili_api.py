@@ -6,27 +6,64 @@ B站API封装模块
 """
 
 import json
+import asyncio
 import logging
 from typing import List, Dict, Optional, Any
 import httpx
 from datetime import datetime
 
+try:
+    # orjson为可选依赖，解析大体积响应比标准库json快数倍
+    import orjson as _json
+except ImportError:
+    _json = json
+
+try:
+    # simdjson为可选依赖，按需读取字段，不会把整个响应物化为Python对象
+    import simdjson
+except ImportError:
+    simdjson = None
+
 logger = logging.getLogger(__name__)
 
+# 点赞列表中入库需要的视频字段
+_LIKE_VIDEO_KEYS = ('aid', 'bvid', 'title', 'pubdate', 'pic')
+
+# 复用同一个simdjson解析器以避免重复分配内部缓冲区
+_like_parser = simdjson.Parser() if simdjson else None
+
+# 遇到这些状态码时按指数退避重试
+_RETRY_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+_RETRY_BACKOFF_SECONDS = 0.3
+
+
+def _slim_video(video) -> Dict:
+    """从点赞列表的单个视频中提取入库需要的字段"""
+    slim = {key: video[key] for key in _LIKE_VIDEO_KEYS if key in video}
+    owner = video.get('owner')
+    slim['owner'] = {'mid': owner.get('mid', 0), 'name': owner.get('name', '')} if owner else {}
+    return slim
+
 
 class BilibiliAPI:
     """B站API异步封装类"""
     
-    def __init__(self, sessdata: str = None, timeout: int = 30):
+    def __init__(self, sessdata: str = None, timeout: int = 30,
+                 max_connections: int = 32, max_retries: int = 3):
         """
         初始化B站API客户端
         
         Args:
             sessdata: Cookie中的SESSDATA值（访问隐私数据需要）
             timeout: 请求超时时间（秒）
+            max_connections: 连接池大小（保持长连接，避免重复TCP/TLS握手）
+            max_retries: 连接失败或遇到429/5xx时的最大重试次数
         """
         self.timeout = timeout
         self.sessdata = sessdata
+        self.max_connections = max_connections
+        self.max_retries = max_retries
+        self._client: Optional[httpx.AsyncClient] = None
         
         # 设置请求头
         self.headers = {
@@ -41,6 +78,39 @@ class BilibiliAPI:
             self.cookies['SESSDATA'] = sessdata
             logger.info("已设置SESSDATA Cookie")
     
+    def _get_client(self) -> httpx.AsyncClient:
+        """获取共享的异步客户端（首次调用时创建），请求头和Cookie只设置一次"""
+        if self._client is None or self._client.is_closed:
+            limits = httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_connections
+            )
+            self._client = httpx.AsyncClient(
+                headers=self.headers,
+                cookies=self.cookies,
+                timeout=self.timeout,
+                limits=limits,
+                # 传输层重试只覆盖建立连接失败的情况
+                transport=httpx.AsyncHTTPTransport(retries=self.max_retries, limits=limits)
+            )
+        return self._client
+    
+    async def _get(self, url: str, params: Optional[Dict] = None) -> httpx.Response:
+        """发送GET请求，遇到限流或服务端错误时退避重试"""
+        client = self._get_client()
+        for attempt in range(self.max_retries + 1):
+            response = await client.get(url, params=params)
+            if response.status_code not in _RETRY_STATUS_CODES or attempt == self.max_retries:
+                return response
+            await asyncio.sleep(_RETRY_BACKOFF_SECONDS * 2 ** attempt)
+        return response
+    
+    async def close(self):
+        """关闭共享的异步客户端"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+    
     async def fetch_user_likes(self, vmid: int) -> Optional[List[Dict]]:
         """
         异步获取用户的点赞视频列表
@@ -49,49 +119,48 @@ class BilibiliAPI:
             vmid: 用户MID
             
         Returns:
-            视频列表或None（失败时）
+            视频列表或None（失败时），每个视频只包含
+            aid、bvid、title、pubdate、pic 和 owner(mid, name) 字段
         """
         url = "https://api.bilibili.com/x/space/like/video"
         params = {'vmid': vmid}
         
         try:
-            logger.info(f"正在异步获取用户 {vmid} 的点赞视频...")
+            logger.info("正在异步获取用户 %s 的点赞视频...", vmid)
             
-            async with httpx.AsyncClient(
-                headers=self.headers,
-                cookies=self.cookies,
-                timeout=self.timeout
-            ) as client:
-                response = await client.get(url, params=params)
-                response.raise_for_status()
-                
-                data = response.json()
-                
-                if data['code'] == 0:
-                    if 'data' in data and data['data']:
-                        if 'list' in data['data']:
-                            videos = data['data']['list']
-                            logger.info(f"成功获取用户 {vmid} 的 {len(videos)} 个点赞视频")
-                            return videos
-                        else:
-                            # API返回格式可能直接是数组
-                            videos = data['data']
-                            logger.info(f"成功获取用户 {vmid} 的 {len(videos)} 个点赞视频")
-                            return videos
+            response = await self._get(url, params)
+            response.raise_for_status()
+            
+            if _like_parser is not None:
+                data = _like_parser.parse(response.content)
+            else:
+                data = _json.loads(response.content)
+            
+            if data['code'] == 0:
+                if 'data' in data and data['data']:
+                    if 'list' in data['data']:
+                        videos = [_slim_video(video) for video in data['data']['list']]
+                        logger.info("成功获取用户 %s 的 %d 个点赞视频", vmid, len(videos))
+                        return videos
                     else:
-                        logger.warning(f"用户 {vmid} 没有点赞数据或数据为空")
-                        return []
-                elif data['code'] == 53013:
-                    logger.error(f"用户 {vmid} 设置了隐私，需要登录")
-                    return None
+                        # API返回格式可能直接是数组
+                        videos = [_slim_video(video) for video in data['data']]
+                        logger.info("成功获取用户 %s 的 %d 个点赞视频", vmid, len(videos))
+                        return videos
                 else:
-                    logger.error(f"API返回错误: code={data['code']}, message={data['message']}")
-                    return None
-                    
+                    logger.warning(f"用户 {vmid} 没有点赞数据或数据为空")
+                    return []
+            elif data['code'] == 53013:
+                logger.error(f"用户 {vmid} 设置了隐私，需要登录")
+                return None
+            else:
+                logger.error(f"API返回错误: code={data['code']}, message={data['message']}")
+                return None
+                
         except httpx.RequestError as e:
             logger.error(f"请求失败: {e}")
             return None
-        except json.JSONDecodeError as e:
+        except (json.JSONDecodeError, ValueError) as e:  # orjson/simdjson 的解析错误均为 ValueError 子类
             logger.error(f"JSON解析失败: {e}")
             return None
         except Exception as e:
@@ -112,26 +181,21 @@ class BilibiliAPI:
         params = {'mid': vmid}
         
         try:
-            logger.info(f"正在异步获取用户 {vmid} 的基本信息...")
+            logger.info("正在异步获取用户 %s 的基本信息...", vmid)
             
-            async with httpx.AsyncClient(
-                headers=self.headers,
-                cookies=self.cookies,
-                timeout=self.timeout
-            ) as client:
-                response = await client.get(url, params=params)
-                response.raise_for_status()
-                
-                data = response.json()
+            response = await self._get(url, params)
+            response.raise_for_status()
+            
+            data = _json.loads(response.content)
+            
+            if data['code'] == 0:
+                user_info = data['data']
+                logger.info("成功获取用户 %s 的基本信息: %s", vmid, user_info.get('name', '未知'))
+                return user_info
+            else:
+                logger.error(f"获取用户信息失败: code={data['code']}, message={data['message']}")
+                return None
                 
-                if data['code'] == 0:
-                    user_info = data['data']
-                    logger.info(f"成功获取用户 {vmid} 的基本信息: {user_info.get('name', '未知')}")
-                    return user_info
-                else:
-                    logger.error(f"获取用户信息失败: code={data['code']}, message={data['message']}")
-                    return None
-                    
         except httpx.RequestError as e:
             logger.error(f"请求用户信息失败: {e}")
             return None
@@ -153,26 +217,21 @@ class BilibiliAPI:
         params = {'aid': aid}
         
         try:
-            logger.info(f"正在异步获取视频 {aid} 的详细信息...")
+            logger.info("正在异步获取视频 %s 的详细信息...", aid)
             
-            async with httpx.AsyncClient(
-                headers=self.headers,
-                cookies=self.cookies,
-                timeout=self.timeout
-            ) as client:
-                response = await client.get(url, params=params)
-                response.raise_for_status()
-                
-                data = response.json()
+            response = await self._get(url, params)
+            response.raise_for_status()
+            
+            data = _json.loads(response.content)
+            
+            if data['code'] == 0:
+                video_info = data['data']
+                logger.info("成功获取视频 %s 的信息: %.20s", aid, video_info.get('title', '未知'))
+                return video_info
+            else:
+                logger.error(f"获取视频信息失败: code={data['code']}, message={data['message']}")
+                return None
                 
-                if data['code'] == 0:
-                    video_info = data['data']
-                    logger.info(f"成功获取视频 {aid} 的信息: {video_info.get('title', '未知')}")
-                    return video_info
-                else:
-                    logger.error(f"获取视频信息失败: code={data['code']}, message={data['message']}")
-                    return None
-                    
         except httpx.RequestError as e:
             logger.error(f"请求视频信息失败: {e}")
             return None
@@ -180,6 +239,28 @@ class BilibiliAPI:
             logger.error(f"获取视频信息时发生未知错误: {e}")
             return None
     
+    async def fetch_video_infos(self, aids: List[int], concurrency: int = 8) -> Dict[int, Dict]:
+        """
+        并发获取多个视频的详细信息
+        
+        所有请求共用客户端连接池，同时进行的请求数不超过 concurrency，避免触发B站限流
+        
+        Args:
+            aids: 视频AID列表
+            concurrency: 最大并发请求数
+            
+        Returns:
+            {aid: 视频信息} 字典，获取失败的视频不包含在内
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def fetch_one(aid: int) -> Optional[Dict]:
+            async with semaphore:
+                return await self.fetch_video_info(aid)
+        
+        results = await asyncio.gather(*(fetch_one(aid) for aid in aids))
+        return {aid: info for aid, info in zip(aids, results) if info is not None}
+    
     async def test_connection(self) -> bool:
         """
         异步测试API连接是否正常
@@ -191,13 +272,8 @@ class BilibiliAPI:
             # 使用一个公开的API端点进行测试
             test_url = "https://api.bilibili.com/x/web-interface/nav"
             
-            async with httpx.AsyncClient(
-                headers=self.headers,
-                cookies=self.cookies,
-                timeout=self.timeout
-            ) as client:
-                response = await client.get(test_url)
-                return response.status_code == 200
+            response = await self._get(test_url)
+            return response.status_code == 200
         except Exception as e:
             logger.error(f"API连接测试失败: {e}")
             return False
@@ -230,5 +306,7 @@ if __name__ == "__main__":
             print(f"✓ 成功获取用户信息: {user_info.get('name')}")
         else:
             print("✗ 获取用户信息失败")
+        
+        await api.close()
     
     asyncio.run(test())
\ No newline at end of file
@@ -6,30 +6,143 @@
 
 import sqlite3
 import logging
-from typing import List, Dict, Optional, Tuple, Any
-from datetime import datetime
+import threading
+import functools
+import contextlib
+import time
+from typing import List, Dict, Optional, Tuple, Any, Iterable, Set
+from datetime import datetime, timezone
 from pathlib import Path
 
 logger = logging.getLogger(__name__)
 
+# 单条语句中IN列表的最大参数个数（SQLite旧版本上限为999）
+_IN_CHUNK_SIZE = 900
+
+
+def _video_row(video_data: Dict) -> Tuple:
+    """按 videos 表插入顺序提取视频字段"""
+    owner = video_data.get('owner') or {}
+    return (
+        video_data.get('aid'),
+        video_data.get('bvid', ''),
+        video_data.get('title', ''),
+        video_data.get('pubdate', 0),
+        owner.get('mid', 0),
+        owner.get('name', ''),
+        video_data.get('pic', '')
+    )
+
 
 class DatabaseManager:
     """数据库管理类"""
     
-    def __init__(self, db_path: str = "bilibili_watcher.db"):
+    # get_recent_likes 可查询的字段与对应的列
+    RECENT_LIKES_FIELD_MAPPING = {
+        'aid': 'v.aid',
+        'bvid': 'v.bvid',
+        'title': 'v.title',
+        'owner_name': 'v.owner_name',
+        'pubdate': 'v.pubdate',
+        'collect_time': 'ul.collect_time',
+        'owner_mid': 'v.owner_mid',
+        'pic': 'v.pic'
+    }
+    
+    # get_recent_likes 的默认字段
+    RECENT_LIKES_DEFAULT_FIELDS = ('aid', 'bvid', 'title', 'owner_name', 'pubdate', 'collect_time')
+    
+    # 每记录多少次更新日志重新执行一次 ANALYZE
+    ANALYZE_INTERVAL_UPDATES = 100
+    
+    # 写入语句（固定的字符串对象，配合长连接命中sqlite3的预编译语句缓存）
+    # 已存在的视频仅在信息有变化时才更新，避免 REPLACE 的删除+重插及无效写入
+    _SQL_INSERT_VIDEO = '''
+        INSERT INTO videos (aid, bvid, title, pubdate, owner_mid, owner_name, pic)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(aid) DO UPDATE SET
+            title = excluded.title,
+            owner_name = excluded.owner_name,
+            pic = excluded.pic
+        WHERE videos.title IS NOT excluded.title
+           OR videos.owner_name IS NOT excluded.owner_name
+           OR videos.pic IS NOT excluded.pic
+        '''
+    _SQL_INSERT_LIKE = '''
+        INSERT OR IGNORE INTO user_likes (user_mid, aid, collect_time)
+        VALUES (?, ?, ?)
+        '''
+    _SQL_INCREMENT_COUNTER = '''
+        INSERT INTO user_counters (user_mid, like_count) VALUES (?, ?)
+        ON CONFLICT(user_mid) DO UPDATE SET like_count = like_count + excluded.like_count
+        '''
+    _SQL_INSERT_LOG = '''
+        INSERT INTO update_log (user_mid, last_update, total_fetched, status)
+        VALUES (?, ?, ?, ?)
+        '''
+    
+    # 读取语句
+    _SQL_VIDEO_EXISTS = "SELECT 1 FROM videos WHERE aid = ?"
+    _SQL_USER_LIKE_EXISTS = "SELECT 1 FROM user_likes WHERE user_mid = ? AND aid = ?"
+    _SQL_USER_LIKES_COUNT = "SELECT like_count FROM user_counters WHERE user_mid = ?"
+    _SQL_LAST_UPDATE = "SELECT last_update FROM update_log WHERE user_mid = ? ORDER BY id DESC LIMIT 1"
+    _SQL_STATISTICS = '''
+        SELECT
+            (SELECT COUNT(*) FROM videos),
+            (SELECT COUNT(*) FROM user_likes),
+            (SELECT COUNT(DISTINCT user_mid) FROM user_likes),
+            (SELECT MAX(last_update) FROM update_log WHERE status = 'success')
+        '''
+    _SQL_USER_STATISTICS = '''
+        SELECT
+            (SELECT COUNT(*) FROM videos),
+            (SELECT COUNT(*) FROM user_likes),
+            (SELECT COUNT(DISTINCT user_mid) FROM user_likes),
+            (SELECT MAX(last_update) FROM update_log WHERE status = 'success'),
+            (SELECT COALESCE(MAX(like_count), 0) FROM user_counters WHERE user_mid = ?),
+            (SELECT last_update FROM update_log WHERE user_mid = ? ORDER BY id DESC LIMIT 1)
+        '''
+    
+    def __init__(self, db_path: str = "bilibili_watcher.db", safe_mode: bool = False):
         """
         初始化数据库管理器
         
         Args:
             db_path: 数据库文件路径
+            safe_mode: 安全模式，开启后使用 synchronous=FULL 保证严格持久性
+                       （默认 NORMAL，WAL 模式下断电最多丢失最近的事务，不会损坏数据库）
         """
         self.db_path = db_path
+        self.safe_mode = safe_mode
+        # 整个实例共用一个长连接，由锁保证跨线程串行访问
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.RLock()
+        # 当前 transaction() 的嵌套层数
+        self._tx_depth = 0
+        # 距上次 ANALYZE 以来记录的更新次数
+        self._updates_since_analyze = 0
         self._init_database()
     
     def _init_database(self):
         """初始化数据库表结构"""
         try:
-            conn = self.get_connection()
+            with self._lock:
+                self._create_tables(self.get_connection())
+            logger.info(f"数据库初始化完成: {self.db_path}")
+        
+        except Exception as e:
+            logger.error(f"数据库初始化失败: {e}")
+            raise
+    
+    def _create_tables(self, conn: sqlite3.Connection):
+        """创建表结构和索引"""
+        # 启用WAL模式（持久化到数据库文件，只需设置一次；不能在事务中切换）
+        journal_mode = conn.execute("PRAGMA journal_mode = WAL").fetchone()[0]
+        if journal_mode.lower() != 'wal':
+            # 内存数据库或不支持共享内存的文件系统上无法启用WAL，会保留原日志模式
+            logger.warning(f"未能启用WAL模式，当前日志模式: {journal_mode}")
+        
+        with self.transaction():
             cursor = conn.cursor()
             
             # 创建视频基本信息表（简化版）
@@ -52,51 +165,148 @@ class DatabaseManager:
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 user_mid INTEGER NOT NULL,
                 aid INTEGER NOT NULL,
-                collect_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                collect_time INTEGER DEFAULT (CAST(strftime('%s', 'now') AS INTEGER)),
                 UNIQUE(user_mid, aid)
             )
             ''')
             
+            # 创建用户点赞计数表（与点赞写入在同一事务中维护，避免每次COUNT(*)）
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'user_counters'")
+            counters_exist = cursor.fetchone() is not None
+            cursor.execute('''
+            CREATE TABLE IF NOT EXISTS user_counters (
+                user_mid INTEGER PRIMARY KEY,
+                like_count INTEGER NOT NULL DEFAULT 0
+            )
+            ''')
+            if not counters_exist:
+                # 旧数据库首次升级时根据已有点赞记录回填计数
+                cursor.execute('''
+                INSERT INTO user_counters (user_mid, like_count)
+                SELECT user_mid, COUNT(*) FROM user_likes GROUP BY user_mid
+                ''')
+            
             # 创建更新记录表（简化版）
             cursor.execute('''
             CREATE TABLE IF NOT EXISTS update_log (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 user_mid INTEGER NOT NULL,
-                last_update TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                last_update INTEGER DEFAULT (CAST(strftime('%s', 'now') AS INTEGER)),
                 total_fetched INTEGER DEFAULT 0,
                 status TEXT DEFAULT 'success'
             )
             ''')
             
+            # 旧版本以文本时间戳存储，统一转换为Unix时间戳（秒）
+            cursor.execute('''
+            UPDATE user_likes SET collect_time = CAST(strftime('%s', collect_time) AS INTEGER)
+            WHERE typeof(collect_time) = 'text'
+            ''')
+            cursor.execute('''
+            UPDATE update_log SET last_update = CAST(strftime('%s', last_update) AS INTEGER)
+            WHERE typeof(last_update) = 'text'
+            ''')
+            
+            # 记录已有索引，用于判断本次是否新增了索引
+            cursor.execute("SELECT name FROM sqlite_master WHERE type = 'index'")
+            existing_indexes = {row[0] for row in cursor.fetchall()}
+            
             # 创建索引
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_user_likes_user ON user_likes(user_mid)')
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_user_likes_aid ON user_likes(aid)')
+            # UNIQUE(user_mid, aid) 自带的索引已覆盖按 user_mid 及 (user_mid, aid) 的查询，
+            # 单列的 user_mid 索引是它的前缀，只会拖慢写入
+            cursor.execute('DROP INDEX IF EXISTS idx_user_likes_user')
+            # 没有按aid单独查询user_likes的场景，该索引只会拖慢写入
+            cursor.execute('DROP INDEX IF EXISTS idx_user_likes_aid')
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_update_log_user ON update_log(user_mid)')
+            # 旧版本的该索引以 aid 作为第三列，同一批写入（collect_time 相同）的点赞会按 aid 排序返回
+            cursor.execute('DROP INDEX IF EXISTS idx_user_likes_user_time')
+            # 覆盖 get_recent_likes 的 WHERE + ORDER BY，按索引顺序读取并在 LIMIT 处提前结束，无需排序也无需回表；
+            # collect_time 相同时按 id 即写入顺序（API 的新到旧）排列
+            cursor.execute(
+                'CREATE INDEX IF NOT EXISTS idx_user_likes_user_recent '
+                'ON user_likes(user_mid, collect_time DESC, id, aid)'
+            )
             
-            conn.commit()
-            logger.info(f"数据库初始化完成: {self.db_path}")
-            
-        except Exception as e:
-            logger.error(f"数据库初始化失败: {e}")
-            raise
-        finally:
-            if 'conn' in locals():
-                conn.close()
+            # 索引有变化时更新统计信息，让查询规划器选中新索引
+            cursor.execute("SELECT name FROM sqlite_master WHERE type = 'index'")
+            if {row[0] for row in cursor.fetchall()} - existing_indexes:
+                cursor.execute("ANALYZE")
     
     def get_connection(self) -> sqlite3.Connection:
-        """获取数据库连接"""
-        conn = sqlite3.connect(self.db_path)
-        conn.execute("PRAGMA foreign_keys = ON")
-        return conn
+        """获取数据库连接（首次调用时创建，之后复用同一个连接）
+        
+        调用方需持有 self._lock 后再使用返回的连接
+        """
+        if self._conn is None:
+            # isolation_level=None 关闭隐式事务，由 transaction() 显式控制事务边界
+            conn = sqlite3.connect(
+                self.db_path, check_same_thread=False, cached_statements=256, isolation_level=None
+            )
+            conn.execute("PRAGMA foreign_keys = ON")
+            conn.execute(f"PRAGMA synchronous = {'FULL' if self.safe_mode else 'NORMAL'}")
+            conn.execute("PRAGMA temp_store = MEMORY")
+            conn.execute("PRAGMA cache_size = -20000")  # 约20MB页缓存
+            conn.execute("PRAGMA mmap_size = 268435456")  # 256MB内存映射
+            self._conn = conn
+        return self._conn
+    
+    @contextlib.contextmanager
+    def transaction(self):
+        """在一个事务中执行多次写入，只在最外层提交一次
+        
+        最外层使用 BEGIN IMMEDIATE 立即获取写锁，嵌套调用使用保存点，
+        内层失败只回滚内层的写入。块内抛出异常时回滚并继续抛出。
+        
+        用法:
+            with db.transaction():
+                db.save_videos_bulk(videos)
+                db.save_user_likes_bulk(user_mid, aids)
+        """
+        with self._lock:
+            conn = self.get_connection()
+            if self._tx_depth == 0:
+                begin, commit, rollback = "BEGIN IMMEDIATE", ("COMMIT",), ("ROLLBACK",)
+            else:
+                savepoint = f"sp_{self._tx_depth}"
+                begin = f"SAVEPOINT {savepoint}"
+                commit = (f"RELEASE {savepoint}",)
+                rollback = (f"ROLLBACK TO {savepoint}", f"RELEASE {savepoint}")
+            
+            conn.execute(begin)
+            self._tx_depth += 1
+            try:
+                yield conn
+                for statement in commit:
+                    conn.execute(statement)
+            except BaseException:
+                if conn.in_transaction:
+                    for statement in rollback:
+                        conn.execute(statement)
+                raise
+            finally:
+                self._tx_depth -= 1
+    
+    def close(self):
+        """关闭数据库连接"""
+        with self._lock:
+            if self._conn is not None:
+                try:
+                    # 关闭前让SQLite按需更新统计信息，长期运行后查询计划不退化
+                    self._conn.execute("PRAGMA optimize")
+                except sqlite3.Error as e:
+                    logger.warning(f"关闭前优化数据库失败: {e}")
+                self._conn.close()
+                self._conn = None
+                logger.info(f"数据库连接已关闭: {self.db_path}")
     
     def video_exists(self, aid: int) -> bool:
         """检查视频是否已存在"""
         try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            cursor.execute("SELECT 1 FROM videos WHERE aid = ?", (aid,))
-            exists = cursor.fetchone() is not None
-            conn.close()
+            with self._lock:
+                conn = self.get_connection()
+                cursor = conn.cursor()
+                cursor.execute(self._SQL_VIDEO_EXISTS, (aid,))
+                exists = cursor.fetchone() is not None
             return exists
         except Exception as e:
             logger.error(f"检查视频存在性失败: {e}")
@@ -105,133 +315,178 @@ class DatabaseManager:
     def user_like_exists(self, user_mid: int, aid: int) -> bool:
         """检查用户点赞关系是否已存在"""
         try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            cursor.execute(
-                "SELECT 1 FROM user_likes WHERE user_mid = ? AND aid = ?",
-                (user_mid, aid)
-            )
-            exists = cursor.fetchone() is not None
-            conn.close()
+            with self._lock:
+                conn = self.get_connection()
+                cursor = conn.cursor()
+                cursor.execute(self._SQL_USER_LIKE_EXISTS, (user_mid, aid))
+                exists = cursor.fetchone() is not None
             return exists
         except Exception as e:
             logger.error(f"检查用户点赞关系失败: {e}")
             return False
     
-    def save_video(self, video_data: Dict) -> bool:
-        """保存视频数据到数据库"""
-        try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            
-            # 提取视频基本信息
-            aid = video_data.get('aid')
-            bvid = video_data.get('bvid', '')
-            title = video_data.get('title', '')
-            pubdate = video_data.get('pubdate', 0)
-            
-            # 提取UP主信息
-            owner = video_data.get('owner', {})
-            owner_mid = owner.get('mid', 0) if owner else 0
-            owner_name = owner.get('name', '') if owner else ''
-            
-            pic = video_data.get('pic', '')
-            
-            # 插入或更新视频信息
-            cursor.execute('''
-            INSERT OR REPLACE INTO videos (aid, bvid, title, pubdate, owner_mid, owner_name, pic)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-            ''', (aid, bvid, title, pubdate, owner_mid, owner_name, pic))
+    def existing_aids(self, aids: Iterable[int]) -> Set[int]:
+        """批量检查视频是否已存在
+        
+        Args:
+            aids: 待检查的视频AID
             
-            conn.commit()
-            conn.close()
-            logger.debug(f"保存视频数据成功: aid={aid}, title={title[:20]}...")
-            return True
+        Returns:
+            其中已存在于数据库的AID集合
+        """
+        return self._select_existing(
+            "SELECT aid FROM videos WHERE aid IN ({})", (), aids
+        )
+    
+    def existing_user_likes(self, user_mid: int, aids: Iterable[int]) -> Set[int]:
+        """批量检查用户点赞关系是否已存在
+        
+        Args:
+            user_mid: 用户MID
+            aids: 待检查的视频AID
             
+        Returns:
+            该用户已点赞记录中包含的AID集合
+        """
+        return self._select_existing(
+            "SELECT aid FROM user_likes WHERE user_mid = ? AND aid IN ({})", (user_mid,), aids
+        )
+    
+    def _select_existing(self, sql_template: str, prefix_params: Tuple, aids: Iterable[int]) -> Set[int]:
+        """按块执行 IN 查询，返回命中的AID集合"""
+        aids = list(aids)
+        found = set()
+        try:
+            with self._lock:
+                conn = self.get_connection()
+                for start in range(0, len(aids), _IN_CHUNK_SIZE):
+                    chunk = aids[start:start + _IN_CHUNK_SIZE]
+                    sql = sql_template.format(', '.join('?' * len(chunk)))
+                    found.update(row[0] for row in conn.execute(sql, (*prefix_params, *chunk)))
+            return found
         except Exception as e:
-            logger.error(f"保存视频数据失败 (aid={video_data.get('aid', 'N/A')}): {e}")
-            return False
+            logger.error(f"批量检查AID存在性失败: {e}")
+            return set()
+    
+    def save_video(self, video_data: Dict) -> bool:
+        """保存视频数据到数据库"""
+        return self.save_videos_bulk([video_data]) == 1
     
     def save_user_like(self, user_mid: int, aid: int) -> bool:
         """保存用户点赞关系"""
+        return self.save_user_likes_bulk(user_mid, [aid]) >= 0
+    
+    def save_videos_bulk(self, videos: List[Dict]) -> int:
+        """批量保存视频数据（单个事务）
+        
+        Args:
+            videos: 视频信息字典列表
+        
+        Returns:
+            成功保存的视频数量，失败时返回0
+        """
+        if not videos:
+            return 0
+        
         try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-            INSERT OR IGNORE INTO user_likes (user_mid, aid)
-            VALUES (?, ?)
-            ''', (user_mid, aid))
-            
-            conn.commit()
-            conn.close()
-            logger.debug(f"保存用户点赞关系成功: user_mid={user_mid}, aid={aid}")
-            return True
+            # 所有行在同一个事务中写入，只提交一次；executemany 按需从 map 中逐行取数据
+            with self.transaction() as conn:
+                conn.executemany(self._SQL_INSERT_VIDEO, map(_video_row, videos))
             
+            logger.debug("批量保存视频数据成功: %d 个", len(videos))
+            return len(videos)
+        
         except Exception as e:
-            logger.error(f"保存用户点赞关系失败: {e}")
-            return False
+            logger.error(f"批量保存视频数据失败: {e}")
+            return 0
+    
+    def save_user_likes_bulk(self, user_mid: int, aids: List[int]) -> int:
+        """批量保存用户点赞关系（单个事务）
+        
+        Args:
+            user_mid: 用户MID
+            aids: 视频AID列表
+        
+        Returns:
+            新增的点赞关系数量，失败时返回-1
+        """
+        if not aids:
+            return 0
+        
+        try:
+            with self.transaction() as conn:
+                # 显式写入Unix时间戳，旧数据库的列默认值仍是文本格式
+                now = int(time.time())
+                cursor = conn.executemany(self._SQL_INSERT_LIKE, ((user_mid, aid, now) for aid in aids))
+                # executemany 的 rowcount 为各行修改数之和，被忽略的重复行不计入
+                new_count = cursor.rowcount
+                if new_count > 0:
+                    conn.execute(self._SQL_INCREMENT_COUNTER, (user_mid, new_count))
+            
+            logger.debug("批量保存用户点赞关系成功: user_mid=%s, 新增%d个", user_mid, new_count)
+            return new_count
+        
+        except Exception as e:
+            logger.error(f"批量保存用户点赞关系失败: {e}")
+            return -1
     
     def log_update(self, user_mid: int, total_fetched: int, status: str = 'success'):
         """记录更新日志"""
         try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-            INSERT INTO update_log (user_mid, total_fetched, status)
-            VALUES (?, ?, ?)
-            ''', (user_mid, total_fetched, status))
-            
-            conn.commit()
-            conn.close()
-            logger.debug(f"记录更新日志成功: user_mid={user_mid}, fetched={total_fetched}")
-            
+            with self.transaction() as conn:
+                conn.execute(self._SQL_INSERT_LOG, (user_mid, int(time.time()), total_fetched, status))
+                
+                # 每隔若干次更新重新收集点赞和视频表的统计信息
+                self._updates_since_analyze += 1
+                if self._updates_since_analyze >= self.ANALYZE_INTERVAL_UPDATES:
+                    conn.execute("ANALYZE user_likes")
+                    conn.execute("ANALYZE videos")
+                    self._updates_since_analyze = 0
+            
+            logger.debug("记录更新日志成功: user_mid=%s, fetched=%s", user_mid, total_fetched)
+        
         except Exception as e:
             logger.error(f"记录更新日志失败: {e}")
     
     def get_user_likes_count(self, user_mid: int) -> int:
         """获取用户的点赞视频数量"""
         try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            
-            cursor.execute(
-                "SELECT COUNT(*) FROM user_likes WHERE user_mid = ?",
-                (user_mid,)
-            )
-            count = cursor.fetchone()[0]
-            
-            conn.close()
-            return count
+            with self._lock:
+                conn = self.get_connection()
+                cursor = conn.cursor()
+                
+                cursor.execute(self._SQL_USER_LIKES_COUNT, (user_mid,))
+                result = cursor.fetchone()
             
+            return result[0] if result else 0
+        
         except Exception as e:
             logger.error(f"获取用户点赞数量失败: {e}")
             return 0
     
-    def get_last_update_time(self, user_mid: int) -> Optional[datetime]:
-        """获取用户最后更新时间"""
+    def get_last_update_ts(self, user_mid: int) -> Optional[int]:
+        """获取用户最后更新时间（Unix时间戳，秒）"""
         try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            
-            cursor.execute(
-                "SELECT last_update FROM update_log WHERE user_mid = ? ORDER BY id DESC LIMIT 1",
-                (user_mid,)
-            )
-            result = cursor.fetchone()
-            
-            conn.close()
-            
-            if result and result[0]:
-                # 将字符串转换为datetime对象
-                return datetime.fromisoformat(result[0].replace('Z', '+00:00'))
-            return None
+            with self._lock:
+                conn = self.get_connection()
+                cursor = conn.cursor()
+                
+                cursor.execute(self._SQL_LAST_UPDATE, (user_mid,))
+                result = cursor.fetchone()
             
+            return result[0] if result and result[0] else None
+        
         except Exception as e:
             logger.error(f"获取最后更新时间失败: {e}")
             return None
     
+    def get_last_update_time(self, user_mid: int) -> Optional[datetime]:
+        """获取用户最后更新时间（UTC时区的datetime）"""
+        timestamp = self.get_last_update_ts(user_mid)
+        if timestamp is None:
+            return None
+        return datetime.fromtimestamp(timestamp, tz=timezone.utc)
+    
     def get_recent_likes(self, user_mid: int, limit: int = 5, fields: List[str] = None) -> List[Dict]:
         """获取用户最近的点赞视频
         
@@ -239,105 +494,76 @@ class DatabaseManager:
             user_mid: 用户MID
             limit: 返回数量限制
             fields: 指定返回的字段列表，如果为None则返回所有字段
-            
+        
         Returns:
             视频信息字典列表
         """
         try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            
-            # 默认字段
-            default_fields = ['aid', 'bvid', 'title', 'owner_name', 'pubdate', 'collect_time']
-            
             if fields is None:
-                fields = default_fields
+                fields = self.RECENT_LIKES_DEFAULT_FIELDS
             
-            # 构建SELECT子句
-            field_mapping = {
-                'aid': 'v.aid',
-                'bvid': 'v.bvid',
-                'title': 'v.title',
-                'owner_name': 'v.owner_name',
-                'pubdate': 'v.pubdate',
-                'collect_time': 'ul.collect_time',
-                'owner_mid': 'v.owner_mid',
-                'pic': 'v.pic'
-            }
+            sql = self._build_recent_likes_sql(tuple(fields))
             
-            select_fields = []
-            for field in fields:
-                if field in field_mapping:
-                    select_fields.append(f"{field_mapping[field]} as {field}")
-                else:
-                    # 如果字段不在映射中，使用原字段名
-                    select_fields.append(field)
+            with self._lock:
+                cursor = self.get_connection().cursor()
+                # 以列名为键直接在C层构造字典，省去逐字段的Python循环
+                cursor.row_factory = sqlite3.Row
+                cursor.execute(sql, (user_mid, limit))
+                rows = cursor.fetchall()
             
-            select_clause = ', '.join(select_fields)
+            # 转换为字典列表
+            return [dict(row) for row in rows]
             
-            cursor.execute(f'''
+        except Exception as e:
+            logger.error(f"获取最近点赞视频失败: {e}")
+            return []
+    
+    @staticmethod
+    @functools.lru_cache(maxsize=32)
+    def _build_recent_likes_sql(fields: Tuple[str, ...]) -> str:
+        """根据字段组合构建 get_recent_likes 的查询语句，每种组合只构建一次"""
+        mapping = DatabaseManager.RECENT_LIKES_FIELD_MAPPING
+        select_fields = []
+        for field in fields:
+            if field in mapping:
+                select_fields.append(f"{mapping[field]} as {field}")
+            else:
+                # 如果字段不在映射中，使用原字段名
+                select_fields.append(field)
+        
+        select_clause = ', '.join(select_fields)
+        
+        return f'''
             SELECT {select_clause}
             FROM user_likes ul
             JOIN videos v ON ul.aid = v.aid
             WHERE ul.user_mid = ?
-            ORDER BY ul.collect_time DESC
+            ORDER BY ul.collect_time DESC, ul.id
             LIMIT ?
-            ''', (user_mid, limit))
-            
-            rows = cursor.fetchall()
-            conn.close()
-            
-            # 转换为字典列表
-            result = []
-            for row in rows:
-                video_dict = {}
-                for i, field in enumerate(fields):
-                    video_dict[field] = row[i]
-                result.append(video_dict)
-            
-            return result
-            
-        except Exception as e:
-            logger.error(f"获取最近点赞视频失败: {e}")
-            return []
+            '''
     
     def get_statistics(self, user_mid: int = None) -> Dict:
-        """获取统计信息"""
+        """获取统计信息（所有统计项合并为一条查询）"""
         try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            
-            stats = {}
-            
-            # 总视频数
-            cursor.execute("SELECT COUNT(*) FROM videos")
-            stats['total_videos'] = cursor.fetchone()[0]
+            sql, params = self._SQL_STATISTICS, ()
             
-            # 总点赞记录数
-            cursor.execute("SELECT COUNT(*) FROM user_likes")
-            stats['total_likes'] = cursor.fetchone()[0]
-            
-            # 不同用户数
-            cursor.execute("SELECT COUNT(DISTINCT user_mid) FROM user_likes")
-            stats['unique_users'] = cursor.fetchone()[0]
+            # 用户特定统计
+            if user_mid:
+                sql, params = self._SQL_USER_STATISTICS, (user_mid, user_mid)
             
-            # 最近更新时间
-            cursor.execute("SELECT MAX(last_update) FROM update_log WHERE status = 'success'")
-            stats['last_update'] = cursor.fetchone()[0]
+            with self._lock:
+                row = self.get_connection().execute(sql, params).fetchone()
             
-            # 用户特定统计
+            stats = {
+                'total_videos': row[0],
+                'total_likes': row[1],
+                'unique_users': row[2],
+                'last_update': row[3],
+            }
             if user_mid:
-                cursor.execute("SELECT COUNT(*) FROM user_likes WHERE user_mid = ?", (user_mid,))
-                stats['user_likes'] = cursor.fetchone()[0]
-                
-                cursor.execute(
-                    "SELECT last_update FROM update_log WHERE user_mid = ? ORDER BY id DESC LIMIT 1",
-                    (user_mid,)
-                )
-                result = cursor.fetchone()
-                stats['user_last_update'] = result[0] if result else None
+                stats['user_likes'] = row[4]
+                stats['user_last_update'] = row[5]
             
-            conn.close()
             return stats
             
         except Exception as e:
@@ -4,10 +4,10 @@ B站监控插件
 监控B站用户的点赞视频，提供查询和更新功能
 """
 
-import re
 import asyncio
-from typing import Optional, Dict, Any
-from datetime import datetime, timedelta
+import functools
+import time
+from typing import Optional, Dict, Any, List, Tuple
 
 from astrbot.api.event import filter, AstrMessageEvent, MessageEventResult
 from astrbot.api.event.filter import event_message_type, EventMessageType
@@ -19,6 +19,91 @@ from .bilibili_api import BilibiliAPI
 from .database_manager import DatabaseManager
 
 
+# 可格式化的时间戳上限（2100-01-01 00:00:00 UTC）
+_MAX_TIMESTAMP = 4102444800
+
+
+@functools.lru_cache(maxsize=4096)
+def _format_date(timestamp: int) -> str:
+    """将Unix时间戳格式化为本地日期字符串"""
+    return time.strftime("%Y-%m-%d", time.localtime(timestamp))
+
+
+# 用户信息缓存的有效期（秒）和最大条目数
+_USER_CACHE_TTL_SECONDS = 600
+_USER_CACHE_MAX_SIZE = 1024
+
+# /watch 命令中切换操作类型的选项
+_WATCH_ACTION_OPTIONS = {
+    '--update': 'update',
+    '--stats': 'stats',
+    '--recent': 'recent',
+    '--help': 'help',
+}
+
+# /watch 命令中切换显示详细度的选项: (详细度, 显示字段)
+_WATCH_DETAIL_OPTIONS = {
+    '--simple': ('simple', ('title',)),
+    '--full': ('full', ('title', 'owner_name', 'pubdate', 'bvid', 'collect_time')),
+}
+
+# /watch 命令格式错误时的提示
+_WATCH_USAGE_ERROR_TEXT = (
+    "❌ 命令格式错误！\n"
+    "正确格式: /watch <uid> [选项]\n"
+    "示例: /watch 123456 --update\n"
+    "使用 /watch <uid> --help 查看详细帮助"
+)
+
+# /watch <uid> --help 的帮助文本
+_WATCH_HELP_TEXT = (
+    "📖 B站监控插件帮助\n"
+    "\n"
+    "命令格式: /watch <uid> [选项]\n"
+    "\n"
+    "选项说明:\n"
+    "• --update    强制更新用户的点赞视频数据\n"
+    "• --stats     显示用户的详细统计信息\n"
+    "• --recent N  显示用户最近N个点赞视频（默认5个）\n"
+    "• --simple    简洁模式显示（仅标题）\n"
+    "• --full      完整模式显示（包含所有字段）\n"
+    "• --fields f1,f2,... 自定义显示字段\n"
+    "• --help      显示此帮助信息\n"
+    "\n"
+    "可用字段: title, owner_name, pubdate, bvid, collect_time, owner_mid, pic\n"
+    "\n"
+    "示例:\n"
+    "/watch 123456                    # 查询用户信息\n"
+    "/watch 123456 --update           # 更新用户数据\n"
+    "/watch 123456 --recent 3         # 显示最近3个点赞\n"
+    "/watch 123456 --recent 5 --simple # 简洁模式显示5个\n"
+    "/watch 123456 --recent 3 --full  # 完整模式显示3个\n"
+    "/watch 123456 --recent 5 --fields title,owner_name  # 自定义字段"
+)
+
+# /bilihelp 的帮助文本
+_BILIHELP_TEXT = (
+    "🎬 B站监控插件 v1.0.0\n"
+    "\n"
+    "主要功能:\n"
+    "• 监控B站用户的点赞视频\n"
+    "• 查询用户点赞统计信息\n"
+    "• 自动缓存和更新数据\n"
+    "• 支持多种显示模式（简洁/完整/自定义）\n"
+    "\n"
+    "主要命令:\n"
+    "• /watch <uid> [选项]  - 监控用户点赞视频\n"
+    "• /bilihelp            - 显示此帮助信息\n"
+    "\n"
+    "高级功能:\n"
+    "• 支持控制显示视频个数 (--recent N)\n"
+    "• 支持控制信息详细度 (--simple/--full)\n"
+    "• 支持自定义显示字段 (--fields field1,field2)\n"
+    "\n"
+    "使用 /watch <uid> --help 查看详细命令帮助"
+)
+
+
 @register("bilibili_watcher", "B站监控插件", "监控B站用户的点赞视频，提供查询和更新功能", "1.0.0")
 class BilibiliWatcher(Star):
     """B站监控插件主类"""
@@ -28,6 +113,10 @@ class BilibiliWatcher(Star):
         self.api: Optional[BilibiliAPI] = None
         self.db: Optional[DatabaseManager] = None
         self.config: Dict[str, Any] = {}
+        # 用户信息缓存: {uid: (缓存时间, 用户信息)}
+        self._user_cache: Dict[int, Tuple[float, Dict[str, Any]]] = {}
+        # 数据过期阈值（秒），initialize 中根据配置重新计算
+        self._update_interval_sec = 6 * 3600
         
     async def initialize(self):
         """插件初始化方法"""
@@ -36,6 +125,7 @@ class BilibiliWatcher(Star):
         try:
             # 加载配置
             self.config = await self._load_config()
+            self._update_interval_sec = self.config.get('update_interval_hours', 6) * 3600
             
             # 初始化API客户端
             sessdata = self.config.get('sessdata')
@@ -43,7 +133,10 @@ class BilibiliWatcher(Star):
             
             # 初始化数据库
             db_path = self.config.get('db_path', 'bilibili_watcher.db')
-            self.db = DatabaseManager(db_path)
+            # 建表和旧数据迁移可能较慢，同样放到工作线程中执行
+            self.db = await asyncio.to_thread(
+                DatabaseManager, db_path, safe_mode=self.config.get('db_safe_mode', False)
+            )
             
             # 测试API连接（异步）
             if await self.api.test_connection():
@@ -66,6 +159,7 @@ class BilibiliWatcher(Star):
             'update_interval_hours': 6,  # 默认更新间隔
             'cache_enabled': True,
             'max_results': 10,
+            'db_safe_mode': False,  # 开启后使用 synchronous=FULL，牺牲写入速度换取严格持久性
         }
     
     def _parse_watch_command(self, message: str) -> Optional[Dict[str, Any]]:
@@ -81,23 +175,16 @@ class BilibiliWatcher(Star):
         /watch <uid> --recent <n> --full     # 完整模式显示
         /watch <uid> --recent <n> --fields title,owner,date  # 自定义字段
         """
-        # 移除命令前缀
-        cmd_text = message.strip()
-        if not cmd_text.startswith('watch'):
+        # 按空白切分，第一个词必须是命令名
+        parts = message.strip().split()
+        if len(parts) < 2 or parts[0] != 'watch':
             return None
         
-        # 提取命令参数部分
-        cmd_text = cmd_text[6:].strip()  # 移除"/watch "
-        
-        # 解析UID
-        parts = cmd_text.split()
-        if not parts:
-            return None
-        
-        try:
-            uid = int(parts[0])
-        except ValueError:
+        # 解析UID（isascii 排除 '²' 这类 isdigit 为真但 int() 无法解析的字符）
+        uid_token = parts[1]
+        if not (uid_token.isascii() and uid_token.isdigit()):
             return None
+        uid = int(uid_token)
         
         params = {
             'uid': uid,
@@ -108,34 +195,27 @@ class BilibiliWatcher(Star):
         }
         
         # 解析选项
-        i = 1
+        i = 2
         while i < len(parts):
             option = parts[i]
             
-            if option == '--update':
-                params['action'] = 'update'
-            elif option == '--stats':
-                params['action'] = 'stats'
-            elif option == '--recent':
-                params['action'] = 'recent'
-                # 检查下一个参数是否为数字
-                if i + 1 < len(parts) and parts[i + 1].isdigit():
-                    params['limit'] = int(parts[i + 1])
-                    i += 1
-            elif option == '--simple':
-                params['detail_level'] = 'simple'
-                params['fields'] = ['title']
-            elif option == '--full':
-                params['detail_level'] = 'full'
-                params['fields'] = ['title', 'owner_name', 'pubdate', 'bvid', 'collect_time']
+            if option in _WATCH_ACTION_OPTIONS:
+                params['action'] = _WATCH_ACTION_OPTIONS[option]
+                # --recent 后可跟显示数量
+                if option == '--recent' and i + 1 < len(parts):
+                    count_token = parts[i + 1]
+                    if count_token.isascii() and count_token.isdigit():
+                        params['limit'] = int(count_token)
+                        i += 1
+            elif option in _WATCH_DETAIL_OPTIONS:
+                detail_level, fields = _WATCH_DETAIL_OPTIONS[option]
+                params['detail_level'] = detail_level
+                params['fields'] = list(fields)
             elif option == '--fields':
                 if i + 1 < len(parts):
-                    fields_str = parts[i + 1]
                     params['detail_level'] = 'custom'
-                    params['fields'] = [field.strip() for field in fields_str.split(',')]
+                    params['fields'] = [field.strip() for field in parts[i + 1].split(',')]
                     i += 1
-            elif option == '--help':
-                params['action'] = 'help'
             
             i += 1
         
@@ -154,7 +234,7 @@ class BilibiliWatcher(Star):
                 return {'success': False, 'message': '获取数据失败，可能是用户设置了隐私或网络问题'}
             
             if not videos:
-                self.db.log_update(uid, 0, 'success')
+                await asyncio.to_thread(self.db.log_update, uid, 0, 'success')
                 return {
                     'success': True,
                     'message': '用户没有点赞视频',
@@ -162,48 +242,108 @@ class BilibiliWatcher(Star):
                     'new_count': 0
                 }
             
-            # 保存视频数据和点赞关系
-            saved_count = 0
-            new_count = 0
-            
-            for video in videos:
-                # 保存视频信息
-                if self.db.save_video(video):
-                    saved_count += 1
-                    
-                    # 检查是否为新的点赞关系
-                    if not self.db.user_like_exists(uid, video['aid']):
-                        new_count += 1
-                    
-                    # 保存点赞关系
-                    self.db.save_user_like(uid, video['aid'])
-            
-            # 记录更新日志
-            self.db.log_update(uid, len(videos), 'success')
+            # SQLite调用是阻塞的，整体放到工作线程中执行，避免卡住事件循环
+            saved_count, new_count, total_count = await asyncio.to_thread(
+                self._store_user_likes, uid, videos
+            )
             
             return {
                 'success': True,
                 'message': f'更新完成: 获取{len(videos)}个视频，保存{saved_count}个，新增{new_count}个点赞',
                 'count': len(videos),
                 'new_count': new_count,
-                'total_count': self.db.get_user_likes_count(uid)
+                'total_count': total_count
             }
             
         except Exception as e:
             logger.error(f"更新用户点赞视频失败: {e}")
-            self.db.log_update(uid, 0, 'failed', str(e))
+            await asyncio.to_thread(self.db.log_update, uid, 0, 'failed')
             return {'success': False, 'message': f'更新失败: {str(e)}'}
     
+    async def _fetch_and_update_many(self, uids: List[int], concurrency: int = 4) -> Dict[int, Dict[str, Any]]:
+        """
+        并发更新多个用户的点赞视频
+        
+        同时进行的更新数不超过 concurrency，避免触发B站限流
+        
+        Args:
+            uids: 用户MID列表
+            concurrency: 最大并发更新数
+            
+        Returns:
+            {uid: 更新结果} 字典，结果格式同 _fetch_and_update_user_likes
+        """
+        # 同一用户只更新一次，避免并发写入同一批点赞
+        uids = list(dict.fromkeys(uids))
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def update_one(uid: int) -> Dict[str, Any]:
+            async with semaphore:
+                return await self._fetch_and_update_user_likes(uid)
+        
+        results = await asyncio.gather(*(update_one(uid) for uid in uids), return_exceptions=True)
+        return {
+            uid: result if not isinstance(result, BaseException)
+            else {'success': False, 'message': f'更新失败: {result}'}
+            for uid, result in zip(uids, results)
+        }
+    
+    def _store_user_likes(self, uid: int, videos: List[Dict]) -> Tuple[int, int, int]:
+        """
+        将获取到的点赞视频写入数据库（同步执行，在工作线程中调用）
+        
+        Args:
+            uid: 用户MID
+            videos: 按点赞时间倒序排列的视频列表
+            
+        Returns:
+            (保存的视频数, 新增的点赞数, 用户当前点赞总数)
+        """
+        # 只查询本批视频中已记录的点赞；不能在第一个已记录的点赞处停止，
+        # 用户重新点赞旧视频时它会回到列表顶部，排在其后的新点赞会被漏掉
+        known_likes = self.db.existing_user_likes(uid, [video['aid'] for video in videos])
+        liked_videos = [video for video in videos if video['aid'] not in known_likes]
+        
+        # 新点赞的视频可能已因其他用户入库，只写入缺失的部分
+        new_aids = [video['aid'] for video in liked_videos]
+        known_videos = self.db.existing_aids(new_aids)
+        new_videos = [video for video in liked_videos if video['aid'] not in known_videos]
+        
+        # 视频、点赞关系和更新日志在同一个事务中写入，只提交一次
+        with self.db.transaction():
+            saved_count = self.db.save_videos_bulk(new_videos)
+            new_count = 0
+            if saved_count == len(new_videos):
+                new_count = max(self.db.save_user_likes_bulk(uid, new_aids), 0)
+            
+            # 记录更新日志
+            self.db.log_update(uid, len(videos), 'success')
+        
+        return saved_count, new_count, self.db.get_user_likes_count(uid)
+    
     async def _get_user_info(self, uid: int) -> Dict[str, Any]:
         """获取用户信息"""
         if not self.api:
             return {'success': False, 'message': 'API未初始化'}
         
+        cache_enabled = self.config.get('cache_enabled', True)
+        if cache_enabled:
+            entry = self._user_cache.get(uid)
+            if entry and time.monotonic() - entry[0] < _USER_CACHE_TTL_SECONDS:
+                return {'success': True, 'data': entry[1]}
+        
         try:
             user_info = await self.api.fetch_user_info(uid)
             if not user_info:
                 return {'success': False, 'message': '获取用户信息失败'}
             
+            if cache_enabled:
+                # 超出容量时淘汰最早写入的条目
+                self._user_cache.pop(uid, None)
+                if len(self._user_cache) >= _USER_CACHE_MAX_SIZE:
+                    del self._user_cache[next(iter(self._user_cache))]
+                self._user_cache[uid] = (time.monotonic(), user_info)
+            
             return {
                 'success': True,
                 'data': user_info
@@ -213,7 +353,59 @@ class BilibiliWatcher(Star):
             return {'success': False, 'message': f'获取用户信息失败: {str(e)}'}
     
     async def _format_watch_response(self, params: Dict[str, Any], result: Dict[str, Any]) -> str:
-        """格式化/watch命令的响应"""
+        """格式化/watch命令的响应，先查询响应所需的数据，再交给同步的格式化逻辑"""
+        action = params['action']
+        if not result.get('success', False) or action == 'update':
+            return self._render_watch_response(params, result)
+        
+        if not self.db:
+            return "❌ 数据库未初始化"
+        
+        # 本次响应需要的数据库查询在一次线程切换中完成
+        load_data = asyncio.to_thread(self._load_watch_data, params)
+        if action == 'query':
+            # 用户信息的网络请求与数据库查询并发进行
+            data, user_result = await asyncio.gather(load_data, self._get_user_info(params['uid']))
+            if user_result['success']:
+                data['user_name'] = user_result['data'].get('name', '未知用户')
+        else:
+            data = await load_data
+        
+        return self._render_watch_response(params, {**result, **data})
+    
+    def _load_watch_data(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """查询stats/recent/query响应所需的数据库数据（同步执行，在工作线程中调用）"""
+        uid = params['uid']
+        action = params['action']
+        
+        if action == 'stats':
+            return {
+                'stats': self.db.get_statistics(uid),
+                'last_update': self.db.get_last_update_ts(uid)
+            }
+        
+        if action == 'recent':
+            limit = params.get('limit', 5)
+            detail_level = params.get('detail_level', 'normal')
+            fields = params.get('fields', ['title', 'owner_name', 'pubdate'])
+            
+            # 根据详细度级别调整字段
+            if detail_level == 'simple':
+                fields = ['title']
+            elif detail_level == 'full':
+                fields = ['title', 'owner_name', 'pubdate', 'bvid', 'collect_time']
+            # custom级别使用params中指定的fields
+            
+            return {'recent_likes': self.db.get_recent_likes(uid, limit, fields)}
+        
+        # query
+        return {
+            'likes_count': self.db.get_user_likes_count(uid),
+            'last_update': self.db.get_last_update_ts(uid)
+        }
+    
+    def _render_watch_response(self, params: Dict[str, Any], result: Dict[str, Any]) -> str:
+        """根据已查询好的数据格式化/watch命令的响应（纯同步，不做任何I/O）"""
         uid = params['uid']
         action = params['action']
         
@@ -228,15 +420,12 @@ class BilibiliWatcher(Star):
             )
         
         elif action == 'stats':
-            if not self.db:
-                return "❌ 数据库未初始化"
-            
-            stats = self.db.get_statistics(uid)
-            last_update = self.db.get_last_update_time(uid)
+            stats = result.get('stats', {})
+            last_update = result.get('last_update')
             
             last_update_str = "从未更新"
             if last_update:
-                last_update_str = last_update.strftime("%Y-%m-%d %H:%M:%S")
+                last_update_str = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(last_update))
             
             return (
                 f"📊 用户 {uid} 统计信息\n"
@@ -246,86 +435,40 @@ class BilibiliWatcher(Star):
             )
         
         elif action == 'recent':
-            if not self.db:
-                return "❌ 数据库未初始化"
-            
-            limit = params.get('limit', 5)
             detail_level = params.get('detail_level', 'normal')
-            fields = params.get('fields', ['title', 'owner_name', 'pubdate'])
-            
-            # 根据详细度级别调整字段
-            if detail_level == 'simple':
-                fields = ['title']
-            elif detail_level == 'full':
-                fields = ['title', 'owner_name', 'pubdate', 'bvid', 'collect_time']
-            # custom级别使用params中指定的fields
-            
-            recent_likes = self.db.get_recent_likes(uid, limit, fields)
+            recent_likes = result.get('recent_likes', [])
             
             if not recent_likes:
                 return f"📭 用户 {uid} 暂无点赞记录"
             
-            response = f"📅 用户 {uid} 最近 {len(recent_likes)} 个点赞视频"
+            # 各片段先收集到列表中，最后一次性拼接
+            parts = [f"📅 用户 {uid} 最近 {len(recent_likes)} 个点赞视频"]
             if detail_level != 'normal':
-                response += f" ({detail_level}模式)"
-            response += ":\n"
+                parts.append(f" ({detail_level}模式)")
+            parts.append(":\n")
             
-            for i, like in enumerate(recent_likes, 1):
-                # 标题处理
-                title = like.get('title', '未知标题')
-                if len(title) > 30:
-                    title = title[:30] + "..."
-                
-                response += f"{i}. {title}\n"
-                
-                # 根据字段显示详细信息
-                if 'owner_name' in like and like['owner_name']:
-                    response += f"   👤 {like['owner_name']}"
-                
-                if 'pubdate' in like and like['pubdate']:
-                    if 'owner_name' in like:
-                        response += " | "
-                    else:
-                        response += "   "
-                    response += f"📅 {self._format_timestamp(like['pubdate'])}"
-                
-                if 'bvid' in like and like['bvid'] and detail_level == 'full':
-                    response += f" | 🔗 {like['bvid']}"
-                
-                if 'collect_time' in like and like['collect_time'] and detail_level == 'full':
-                    collect_time = like['collect_time']
-                    if isinstance(collect_time, str):
-                        response += f" | ⏰ {collect_time[:10]}"
-                
-                response += "\n"
+            parts.extend(
+                self._render_like(i, like, detail_level) for i, like in enumerate(recent_likes, 1)
+            )
             
             # 添加使用提示
             if detail_level == 'normal':
-                response += "\n💡 提示: 使用 --simple 显示简洁版，--full 显示完整版，或 --fields 自定义字段"
+                parts.append("\n💡 提示: 使用 --simple 显示简洁版，--full 显示完整版，或 --fields 自定义字段")
             
-            return response
+            return "".join(parts)
         
         else:  # query action
-            if not self.db:
-                return "❌ 数据库未初始化"
-            
-            # 获取用户信息
-            user_result = await self._get_user_info(uid)
-            user_name = "未知用户"
-            if user_result['success']:
-                user_name = user_result['data'].get('name', '未知用户')
-            
-            # 获取统计信息
-            likes_count = self.db.get_user_likes_count(uid)
-            last_update = self.db.get_last_update_time(uid)
+            user_name = result.get('user_name', "未知用户")
+            likes_count = result.get('likes_count', 0)
+            last_update = result.get('last_update')
             
             last_update_str = "从未更新"
             update_suggestion = "（建议使用 /watch <uid> --update 进行更新）"
             if last_update:
-                last_update_str = last_update.strftime("%Y-%m-%d %H:%M:%S")
+                last_update_str = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(last_update))
                 
                 # 检查是否需要更新
-                if datetime.now() - last_update > timedelta(hours=self.config.get('update_interval_hours', 6)):
+                if time.time() - last_update > self._update_interval_sec:
                     update_suggestion = "（数据可能已过期，建议使用 --update 更新）"
                 else:
                     update_suggestion = "（数据较新）"
@@ -341,13 +484,40 @@ class BilibiliWatcher(Star):
                 f"• /watch {uid} --recent 5  # 查看最近5个点赞"
             )
     
+    def _render_like(self, index: int, like: Dict[str, Any], detail_level: str) -> str:
+        """格式化 --recent 列表中的单个点赞视频（标题行 + 详细信息行）"""
+        # 标题处理
+        title = like.get('title', '未知标题')
+        if len(title) > 30:
+            title = title[:30] + "..."
+        
+        parts = [f"{index}. {title}\n"]
+        
+        # 根据字段显示详细信息
+        if like.get('owner_name'):
+            parts.append(f"   👤 {like['owner_name']}")
+        
+        if like.get('pubdate'):
+            parts.append(" | " if 'owner_name' in like else "   ")
+            parts.append(f"📅 {self._format_timestamp(like['pubdate'])}")
+        
+        if detail_level == 'full':
+            if like.get('bvid'):
+                parts.append(f" | 🔗 {like['bvid']}")
+            
+            if like.get('collect_time'):
+                parts.append(f" | ⏰ {self._format_timestamp(like['collect_time'])}")
+        
+        parts.append("\n")
+        return "".join(parts)
+    
     def _format_timestamp(self, timestamp: int) -> str:
         """格式化时间戳为可读字符串"""
-        try:
-            dt = datetime.fromtimestamp(timestamp)
-            return dt.strftime("%Y-%m-%d")
-        except:
+        # 预先检查范围，正常路径上无需异常处理
+        if not isinstance(timestamp, (int, float)) or not 0 <= timestamp < _MAX_TIMESTAMP:
             return "未知时间"
+        # 时区偏移都是15分钟的整数倍，按15分钟取整不会改变本地日期，同时能大量命中缓存
+        return _format_date(timestamp // 900 * 900)
     
     @event_message_type(EventMessageType.ALL)
     @filter.command("watch")
@@ -373,39 +543,11 @@ class BilibiliWatcher(Star):
         params = self._parse_watch_command(message)
         
         if not params:
-            yield event.plain_result(
-                "❌ 命令格式错误！\n"
-                "正确格式: /watch <uid> [选项]\n"
-                "示例: /watch 123456 --update\n"
-                "使用 /watch <uid> --help 查看详细帮助"
-            )
+            yield event.plain_result(_WATCH_USAGE_ERROR_TEXT)
             return
         
         if params['action'] == 'help':
-            yield event.plain_result(
-                "📖 B站监控插件帮助\n"
-                "\n"
-                "命令格式: /watch <uid> [选项]\n"
-                "\n"
-                "选项说明:\n"
-                "• --update    强制更新用户的点赞视频数据\n"
-                "• --stats     显示用户的详细统计信息\n"
-                "• --recent N  显示用户最近N个点赞视频（默认5个）\n"
-                "• --simple    简洁模式显示（仅标题）\n"
-                "• --full      完整模式显示（包含所有字段）\n"
-                "• --fields f1,f2,... 自定义显示字段\n"
-                "• --help      显示此帮助信息\n"
-                "\n"
-                "可用字段: title, owner_name, pubdate, bvid, collect_time, owner_mid, pic\n"
-                "\n"
-                "示例:\n"
-                "/watch 123456                    # 查询用户信息\n"
-                "/watch 123456 --update           # 更新用户数据\n"
-                "/watch 123456 --recent 3         # 显示最近3个点赞\n"
-                "/watch 123456 --recent 5 --simple # 简洁模式显示5个\n"
-                "/watch 123456 --recent 3 --full  # 完整模式显示3个\n"
-                "/watch 123456 --recent 5 --fields title,owner_name  # 自定义字段"
-            )
+            yield event.plain_result(_WATCH_HELP_TEXT)
             return
         
         uid = params['uid']
@@ -417,18 +559,12 @@ class BilibiliWatcher(Star):
             
             # 执行更新操作
             result = await self._fetch_and_update_user_likes(uid)
-            response = await self._format_watch_response(params, result)
+            # 更新结果已包含所需数据，直接同步格式化
+            response = self._render_watch_response(params, result)
             
         else:
-            # 对于查询、统计等操作，直接返回结果
-            if params['action'] == 'stats':
-                result = {'success': True}
-            elif params['action'] == 'recent':
-                result = {'success': True}
-            else:  # query
-                result = {'success': True}
-            
-            response = await self._format_watch_response(params, result)
+            # 查询、统计等操作只需读取数据库（query 另需获取用户信息）
+            response = await self._format_watch_response(params, {'success': True})
         
         yield event.plain_result(response)
     
@@ -440,32 +576,15 @@ class BilibiliWatcher(Star):
         # if event.is_at_or_wake_command:
         #     return
         
-        help_text = (
-            "🎬 B站监控插件 v1.0.0\n"
-            "\n"
-            "主要功能:\n"
-            "• 监控B站用户的点赞视频\n"
-            "• 查询用户点赞统计信息\n"
-            "• 自动缓存和更新数据\n"
-            "• 支持多种显示模式（简洁/完整/自定义）\n"
-            "\n"
-            "主要命令:\n"
-            "• /watch <uid> [选项]  - 监控用户点赞视频\n"
-            "• /bilihelp            - 显示此帮助信息\n"
-            "\n"
-            "高级功能:\n"
-            "• 支持控制显示视频个数 (--recent N)\n"
-            "• 支持控制信息详细度 (--simple/--full)\n"
-            "• 支持自定义显示字段 (--fields field1,field2)\n"
-            "\n"
-            "使用 /watch <uid> --help 查看详细命令帮助"
-        )
-        yield event.plain_result(help_text)
+        yield event.plain_result(_BILIHELP_TEXT)
     
     async def terminate(self):
         """插件销毁方法"""
         logger.info("B站监控插件正在关闭...")
-        # 可以在这里进行资源清理
+        if self.api:
+            await self.api.close()
+        if self.db:
+            await asyncio.to_thread(self.db.close)
         logger.info("✓ B站监控插件已关闭")
 
 
@@ -7,15 +7,27 @@ API: https://api.bilibili.com/x/space/like/video
 
 import sqlite3
 import json
+import functools
+import itertools
+import contextlib
+from operator import itemgetter
 import time
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import logging
 from datetime import datetime
-from typing import List, Dict, Optional, Tuple
-import schedule
+from typing import List, Dict, Optional, Tuple, Set
 import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import sys
 
+try:
+    # orjson为可选依赖，解析大体积点赞列表比标准库json快数倍
+    import orjson as _json
+except ImportError:
+    _json = json
+
 # 配置日志
 logging.basicConfig(
     level=logging.INFO,
@@ -27,6 +39,240 @@ logging.basicConfig(
 )
 logger = logging.getLogger('BilibiliLikesSpider')
 
+# 单条语句中IN列表的最大参数个数（SQLite旧版本上限为999）
+_IN_CHUNK_SIZE = 500
+
+# 以 id 为主键的高频写入表（只需唯一的行号，不需要 AUTOINCREMENT 的单调保证）
+_ROWID_TABLES = ('user_likes', 'update_log')
+
+# video_stats 改为以 (aid, collect_time) 为主键的 WITHOUT ROWID 表后，从旧结构拷贝的列
+_VIDEO_STATS_COLUMNS = (
+    'aid, collect_time, view, danmaku, reply, favorite, coin, share, '
+    'like_count, now_rank, his_rank, vt, vv'
+)
+
+# 大批量写入时可以先删除、写完再重建的普通索引（主键和UNIQUE索引不在其中）
+_DEFERRABLE_INDEXES = {
+    'idx_user_likes_user': 'CREATE INDEX IF NOT EXISTS idx_user_likes_user ON user_likes(user_mid)',
+    'idx_user_likes_aid': 'CREATE INDEX IF NOT EXISTS idx_user_likes_aid ON user_likes(aid)',
+    'idx_videos_pubdate': 'CREATE INDEX IF NOT EXISTS idx_videos_pubdate ON videos(pubdate DESC)',
+}
+
+# 超过该行数的批量写入会先删除普通索引、关闭外键检查，写完后一次性重建和校验
+_BULK_INSERT_THRESHOLD = 500
+
+# 通过外键引用 videos 的子表
+_FK_CHILD_TABLES = ('video_stats', 'video_dimension')
+
+# 单条语句允许绑定的最大参数个数（SQLite 3.32 之前的默认上限）
+_MAX_SQL_VARIABLES = 999
+
+# 各表的插入语句（单条保存和批量保存共用）
+_SQL_INSERT_VIDEO = '''
+INSERT OR IGNORE INTO videos (
+    aid, bvid, title, duration, pubdate, ctime, tid, tname, desc, pic,
+    owner_mid, owner_name, copyright, state, pub_location, short_link,
+    first_frame, subtitle, resource_type, enable_vt
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+# 同一视频同一秒内只保留一条统计（主键为 (aid, collect_time)）
+_SQL_INSERT_STAT = '''
+INSERT OR IGNORE INTO video_stats (
+    aid, view, danmaku, reply, favorite, coin, share,
+    like_count, now_rank, his_rank, vt, vv
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+if sqlite3.sqlite_version_info >= (3, 24, 0):
+    # UPSERT 在冲突时原地更新，避免 REPLACE 的删除+重插及重复的索引维护
+    _SQL_UPSERT_DIM = '''
+    INSERT INTO video_dimension (aid, width, height, rotate)
+    VALUES (?, ?, ?, ?)
+    ON CONFLICT(aid) DO UPDATE SET
+        width = excluded.width,
+        height = excluded.height,
+        rotate = excluded.rotate
+    '''
+    _SQL_INSERT_LIKE = '''
+    INSERT INTO user_likes (user_mid, aid)
+    VALUES (?, ?)
+    ON CONFLICT(user_mid, aid) DO NOTHING
+    '''
+else:
+    # SQLite 3.24 之前不支持 ON CONFLICT 子句
+    _SQL_UPSERT_DIM = '''
+    INSERT OR REPLACE INTO video_dimension (aid, width, height, rotate)
+    VALUES (?, ?, ?, ?)
+    '''
+    _SQL_INSERT_LIKE = '''
+    INSERT OR IGNORE INTO user_likes (user_mid, aid)
+    VALUES (?, ?)
+    '''
+
+if sqlite3.sqlite_version_info >= (3, 35, 0):
+    # RETURNING 只返回真正插入的行，新增点赞数由写入结果得出，无需预先查询已有关系
+    _SQL_INSERT_LIKE_RETURNING = '''
+    INSERT INTO user_likes (user_mid, aid)
+    VALUES (?, ?)
+    ON CONFLICT(user_mid, aid) DO NOTHING
+    RETURNING aid
+    '''
+else:
+    _SQL_INSERT_LIKE_RETURNING = None
+
+_SQL_INSERT_LOG = '''
+INSERT INTO update_log (user_mid, total_fetched, status, error_msg)
+VALUES (?, ?, ?, ?)
+'''
+
+# 存在性检查语句（{} 处填入 IN 列表的占位符）
+_SQL_VIDEO_EXISTS = "SELECT 1 FROM videos WHERE aid = ?"
+_SQL_USER_LIKE_EXISTS = "SELECT 1 FROM user_likes WHERE user_mid = ? AND aid = ?"
+_SQL_EXISTING_VIDEOS = "SELECT aid FROM videos WHERE aid IN ({})"
+_SQL_EXISTING_LIKES = "SELECT aid FROM user_likes WHERE user_mid = ? AND aid IN ({})"
+# 由触发器维护行数的表 -> meta 表中的计数键
+_COUNTED_TABLES = {
+    'videos': 'videos_count',
+    'user_likes': 'user_likes_count',
+}
+
+# 统计语句（每个统计项是一个标量子查询，一次往返取回全部结果；
+# 总行数读 meta 中维护的计数，不再全表 COUNT(*)）
+_SQL_STATISTICS = '''
+SELECT
+    (SELECT value FROM meta WHERE key = 'videos_count'),
+    (SELECT value FROM meta WHERE key = 'user_likes_count'),
+    (SELECT COUNT(DISTINCT user_mid) FROM user_likes),
+    (SELECT MAX(last_update) FROM update_log WHERE status = 'success')
+'''
+_SQL_USER_STATISTICS = '''
+SELECT
+    (SELECT value FROM meta WHERE key = 'videos_count'),
+    (SELECT value FROM meta WHERE key = 'user_likes_count'),
+    (SELECT COUNT(DISTINCT user_mid) FROM user_likes),
+    (SELECT MAX(last_update) FROM update_log WHERE status = 'success'),
+    (SELECT COUNT(*) FROM user_likes WHERE user_mid = ?),
+    (SELECT last_update FROM update_log WHERE user_mid = ? ORDER BY id DESC LIMIT 1)
+'''
+
+# API字段与默认值，顺序与对应表的插入列一致
+# videos 表中 desc 之前的字段（aid 单独处理）
+_VIDEO_HEAD_FIELDS = (
+    ('bvid', ''), ('title', ''), ('duration', 0), ('pubdate', 0),
+    ('ctime', 0), ('tid', 0), ('tname', ''),
+)
+# videos 表中 owner 之后的字段
+_VIDEO_TAIL_FIELDS = (
+    ('copyright', 0), ('state', 0), ('pub_location', ''), ('short_link_v2', ''),
+    ('first_frame', ''), ('subtitle', ''), ('resource_type', ''), ('enable_vt', 0),
+)
+_STAT_FIELDS = (
+    ('view', 0), ('danmaku', 0), ('reply', 0), ('favorite', 0), ('coin', 0), ('share', 0),
+    ('like', 0),  # API返回的是like，不是like_count
+    ('now_rank', 0), ('his_rank', 0), ('vt', 0), ('vv', 0),
+)
+_DIMENSION_FIELDS = (('width', 0), ('height', 0), ('rotate', 0))
+
+_get_video_head = itemgetter(*(key for key, _ in _VIDEO_HEAD_FIELDS))
+_get_video_tail = itemgetter(*(key for key, _ in _VIDEO_TAIL_FIELDS))
+_get_stat = itemgetter(*(key for key, _ in _STAT_FIELDS))
+_get_dimension = itemgetter(*(key for key, _ in _DIMENSION_FIELDS))
+
+
+@functools.lru_cache(maxsize=32)
+def _multi_row_sql(sql: str, row_count: int) -> str:
+    """将单行 VALUES 插入语句扩展为一次插入 row_count 行的语句"""
+    head, values, tail = sql.partition('VALUES ')
+    placeholders, _, rest = tail.partition(')')
+    return head + values + ', '.join([placeholders + ')'] * row_count) + rest
+
+
+def _insert_rows(cursor: sqlite3.Cursor, sql: str, rows: List[Tuple]):
+    """
+    批量插入多行数据
+    
+    每条语句通过多行 VALUES 写入尽可能多的行（参数总数不超过 _MAX_SQL_VARIABLES），
+    不足一整块的剩余行使用单行语句写入
+    
+    Args:
+        cursor: 数据库游标
+        sql: 单行 VALUES 形式的插入语句
+        rows: 待插入的行
+    """
+    if not rows:
+        return
+    
+    rows_per_statement = max(_MAX_SQL_VARIABLES // len(rows[0]), 1)
+    full_count = len(rows) - len(rows) % rows_per_statement
+    if full_count:
+        # 先一次性展平为参数列表，每条语句的参数直接按定长切片取得
+        params = list(itertools.chain.from_iterable(rows[:full_count]))
+        width = rows_per_statement * len(rows[0])
+        cursor.executemany(
+            _multi_row_sql(sql, rows_per_statement),
+            (params[start:start + width] for start in range(0, len(params), width))
+        )
+    if full_count < len(rows):
+        cursor.executemany(sql, rows[full_count:])
+
+
+def _insert_rows_returning(cursor: sqlite3.Cursor, sql: str, rows: List[Tuple]) -> int:
+    """
+    批量执行带 RETURNING 的插入语句，返回实际插入的行数
+    
+    executemany 不能取回 RETURNING 的结果，这里按多行 VALUES 分块逐条执行
+    
+    Args:
+        cursor: 数据库游标
+        sql: 单行 VALUES 形式、带 RETURNING 子句的插入语句
+        rows: 待插入的行
+    """
+    if not rows:
+        return 0
+    
+    rows_per_statement = max(_MAX_SQL_VARIABLES // len(rows[0]), 1)
+    inserted = 0
+    for start in range(0, len(rows), rows_per_statement):
+        chunk = rows[start:start + rows_per_statement]
+        cursor.execute(_multi_row_sql(sql, len(chunk)), tuple(itertools.chain.from_iterable(chunk)))
+        inserted += len(cursor.fetchall())
+    return inserted
+
+
+def _pick_fields(data: Dict, getter: itemgetter, fields: Tuple[Tuple[str, object], ...]) -> Tuple:
+    """按 fields 顺序取值；字段齐全时走 itemgetter 的C实现，有缺失时逐个取值并使用默认值"""
+    try:
+        return getter(data)
+    except KeyError:
+        return tuple(data.get(key, default) for key, default in fields)
+
+
+def _video_rows(video_data: Dict) -> Tuple[Tuple, Optional[Tuple], Optional[Tuple]]:
+    """
+    将API返回的单个视频转换为各表的插入行
+    
+    Returns:
+        (videos行, video_stats行或None, video_dimension行或None)
+    """
+    aid = video_data['aid']
+    owner = video_data.get('owner')
+    video_row = (
+        aid,
+        *_pick_fields(video_data, _get_video_head, _VIDEO_HEAD_FIELDS),
+        (video_data.get('desc') or '')[:500],  # 限制描述长度
+        video_data.get('pic', ''),
+        owner['mid'] if owner else 0,
+        owner['name'] if owner else '',
+        *_pick_fields(video_data, _get_video_tail, _VIDEO_TAIL_FIELDS)
+    )
+    
+    stat = video_data.get('stat')
+    stat_row = (aid, *_pick_fields(stat, _get_stat, _STAT_FIELDS)) if stat is not None else None
+    
+    dim = video_data.get('dimension')
+    dim_row = (aid, *_pick_fields(dim, _get_dimension, _DIMENSION_FIELDS)) if dim is not None else None
+    
+    return video_row, stat_row, dim_row
+
 
 class BilibiliLikesSpider:
     def __init__(self, db_path: str = 'bilibili_likes.db', sessdata: str = None):
@@ -39,6 +285,11 @@ class BilibiliLikesSpider:
         """
         self.db_path = db_path
         self.session = requests.Session()
+        
+        # 调大连接池并在连接失败或遇到限流/服务端错误时按指数退避重试
+        retry = Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504])
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=retry)
+        self.session.mount('https://', adapter)
         self.base_url = "https://api.bilibili.com/x/space/like/video"
         
         # 设置请求头
@@ -53,13 +304,57 @@ class BilibiliLikesSpider:
             self.session.cookies.set('SESSDATA', sessdata, domain='.bilibili.com')
             logger.info("已设置SESSDATA Cookie")
         
+        # 整个爬虫共用一个长连接，PRAGMA只需设置一次
+        self.conn = self._connect()
+        
         # 初始化数据库
         self._init_database()
     
+    def _connect(self) -> sqlite3.Connection:
+        """打开数据库连接并应用连接级的PRAGMA设置
+        
+        连接使用 isolation_level=None（自动提交），需要批量写入时由调用方显式 BEGIN/COMMIT
+        """
+        conn = sqlite3.connect(
+            self.db_path, check_same_thread=False, isolation_level=None, cached_statements=256
+        )
+        conn.execute("PRAGMA foreign_keys = ON")
+        conn.execute("PRAGMA synchronous = NORMAL")  # WAL模式下只在检查点时fsync
+        conn.execute("PRAGMA temp_store = MEMORY")
+        conn.execute("PRAGMA cache_size = -65536")  # 约64MB页缓存
+        conn.execute("PRAGMA mmap_size = 268435456")  # 256MB内存映射
+        return conn
+    
     def _init_database(self):
         """初始化数据库表结构"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        cursor = self.conn.cursor()
+        
+        # 启用WAL模式（持久化到数据库文件，读写互不阻塞）
+        cursor.execute("PRAGMA journal_mode = WAL")
+        
+        # 建表和迁移在同一个事务中完成，中途失败不会留下半迁移的表
+        cursor.execute("BEGIN IMMEDIATE")
+        
+        # 旧版本的这些表使用 AUTOINCREMENT，每次插入都要额外读写 sqlite_sequence；
+        # 先改名保留旧数据，按新结构重建后再拷回
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name IN (%s) AND sql LIKE '%%AUTOINCREMENT%%'"
+            % ', '.join('?' * len(_ROWID_TABLES)),
+            _ROWID_TABLES
+        )
+        migrated_tables = [row[0] for row in cursor.fetchall()]
+        for table in migrated_tables:
+            cursor.execute(f"ALTER TABLE {table} RENAME TO {table}_old")
+        
+        # 旧版本的 video_stats 带有无用的 id 主键，每行要同时写 rowid 表和 aid 相关的查找；
+        # 改为 WITHOUT ROWID 后数据直接按 (aid, collect_time) 聚簇存放
+        cursor.execute(
+            "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'video_stats' AND sql NOT LIKE '%WITHOUT ROWID%'"
+        )
+        old_stats = cursor.fetchone()
+        migrate_stats = old_stats is not None
+        if migrate_stats:
+            cursor.execute("ALTER TABLE video_stats RENAME TO video_stats_old")
         
         # 创建视频基本信息表
         cursor.execute('''
@@ -91,8 +386,8 @@ class BilibiliLikesSpider:
         # 创建视频统计数据表
         cursor.execute('''
         CREATE TABLE IF NOT EXISTS video_stats (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            aid INTEGER,
+            aid INTEGER NOT NULL,
+            collect_time TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
             view INTEGER,
             danmaku INTEGER,
             reply INTEGER,
@@ -104,15 +399,15 @@ class BilibiliLikesSpider:
             his_rank INTEGER,
             vt INTEGER,
             vv INTEGER,
-            collect_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (aid, collect_time),
             FOREIGN KEY (aid) REFERENCES videos (aid) ON DELETE CASCADE
-        )
+        ) WITHOUT ROWID
         ''')
         
         # 创建用户点赞关系表
         cursor.execute('''
         CREATE TABLE IF NOT EXISTS user_likes (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            id INTEGER PRIMARY KEY,
             user_mid INTEGER NOT NULL,
             aid INTEGER NOT NULL,
             collect_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
@@ -134,7 +429,7 @@ class BilibiliLikesSpider:
         # 创建更新记录表
         cursor.execute('''
         CREATE TABLE IF NOT EXISTS update_log (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            id INTEGER PRIMARY KEY,
             user_mid INTEGER NOT NULL,
             last_update TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
             total_fetched INTEGER DEFAULT 0,
@@ -143,16 +438,89 @@ class BilibiliLikesSpider:
         )
         ''')
         
+        # 拷回旧数据（需在建索引之前删除旧表，旧表上的同名索引会随之删除）
+        for table in migrated_tables:
+            cursor.execute(f"INSERT INTO {table} SELECT * FROM {table}_old")
+            cursor.execute(f"DROP TABLE {table}_old")
+            cursor.execute("DELETE FROM sqlite_sequence WHERE name IN (?, ?)", (table, f"{table}_old"))
+            logger.info(f"已将表 {table} 迁移为隐式ROWID主键")
+        
+        if migrate_stats:
+            # 同一视频同一秒内的重复采集在新主键下只保留最早的一条
+            cursor.execute(
+                f"INSERT OR IGNORE INTO video_stats ({_VIDEO_STATS_COLUMNS}) "
+                f"SELECT {_VIDEO_STATS_COLUMNS} FROM video_stats_old WHERE aid IS NOT NULL ORDER BY id"
+            )
+            cursor.execute("DROP TABLE video_stats_old")
+            if 'AUTOINCREMENT' in old_stats[0]:
+                cursor.execute("DELETE FROM sqlite_sequence WHERE name IN ('video_stats', 'video_stats_old')")
+            logger.info("已将表 video_stats 迁移为 WITHOUT ROWID 表")
+        
+        # 创建计数表，videos 和 user_likes 的总行数由触发器维护
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value INTEGER NOT NULL DEFAULT 0
+        )
+        ''')
+        self._init_row_counters(cursor)
+        
         # 创建索引
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_user_likes_user ON user_likes(user_mid)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_user_likes_aid ON user_likes(aid)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_videos_pubdate ON videos(pubdate DESC)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_update_log_user ON update_log(user_mid)')
+        for index_sql in _DEFERRABLE_INDEXES.values():
+            cursor.execute(index_sql)
+        # 覆盖"查询用户最近一次更新"：按 user_mid 定位后沿 id 倒序读取第一条，无需回表
+        cursor.execute(
+            'CREATE INDEX IF NOT EXISTS idx_update_log_user_id ON update_log(user_mid, id DESC, last_update)'
+        )
+        # 单列的 user_mid 索引是上面索引的前缀，只会拖慢写入
+        cursor.execute('DROP INDEX IF EXISTS idx_update_log_user')
+        
+        cursor.execute("COMMIT")
         
-        conn.commit()
-        conn.close()
         logger.info(f"数据库初始化完成: {self.db_path}")
     
+    def _init_row_counters(self, cursor: sqlite3.Cursor):
+        """
+        为需要计数的表创建维护 meta 计数的触发器
+        
+        触发器不存在时（新库、旧版本库或表刚被迁移重建）按当前数据重新计数一次，
+        之后的增删都由触发器同步到 meta。被 OR IGNORE / DO NOTHING 跳过的行不会触发。
+        需要在 _init_database 的事务中调用，拷回迁移数据之后执行。
+        """
+        for table, key in _COUNTED_TABLES.items():
+            cursor.execute(
+                "SELECT COUNT(*) FROM sqlite_master WHERE type = 'trigger' AND name IN (?, ?)",
+                (f"{table}_count_ai", f"{table}_count_ad")
+            )
+            if cursor.fetchone()[0] == 2:
+                continue
+            
+            cursor.execute(f"DROP TRIGGER IF EXISTS {table}_count_ai")
+            cursor.execute(f"DROP TRIGGER IF EXISTS {table}_count_ad")
+            cursor.execute(
+                f"INSERT OR REPLACE INTO meta (key, value) SELECT ?, COUNT(*) FROM {table}",
+                (key,)
+            )
+            cursor.execute(f'''
+            CREATE TRIGGER {table}_count_ai AFTER INSERT ON {table}
+            BEGIN
+                UPDATE meta SET value = value + 1 WHERE key = '{key}';
+            END
+            ''')
+            cursor.execute(f'''
+            CREATE TRIGGER {table}_count_ad AFTER DELETE ON {table}
+            BEGIN
+                UPDATE meta SET value = value - 1 WHERE key = '{key}';
+            END
+            ''')
+            logger.info(f"已为表 {table} 建立行数计数")
+    
+    def close(self):
+        """关闭数据库连接和HTTP会话"""
+        self.conn.close()
+        self.session.close()
+        logger.info(f"数据库连接已关闭: {self.db_path}")
+    
     def fetch_user_likes(self, vmid: int) -> Optional[List[Dict]]:
         """
         获取用户的点赞视频列表
@@ -174,7 +542,7 @@ class BilibiliLikesSpider:
             )
             response.raise_for_status()
             
-            data = response.json()
+            data = _json.loads(response.content)
             
             if data['code'] == 0:
                 if 'data' in data and data['data']:
@@ -203,18 +571,52 @@ class BilibiliLikesSpider:
     def video_exists(self, conn: sqlite3.Connection, aid: int) -> bool:
         """检查视频是否已存在"""
         cursor = conn.cursor()
-        cursor.execute("SELECT 1 FROM videos WHERE aid = ?", (aid,))
+        cursor.execute(_SQL_VIDEO_EXISTS, (aid,))
         return cursor.fetchone() is not None
     
     def user_like_exists(self, conn: sqlite3.Connection, user_mid: int, aid: int) -> bool:
         """检查用户点赞关系是否已存在"""
         cursor = conn.cursor()
-        cursor.execute(
-            "SELECT 1 FROM user_likes WHERE user_mid = ? AND aid = ?",
-            (user_mid, aid)
-        )
+        cursor.execute(_SQL_USER_LIKE_EXISTS, (user_mid, aid))
         return cursor.fetchone() is not None
     
+    @contextlib.contextmanager
+    def _bulk_insert_mode(self, conn: sqlite3.Connection):
+        """
+        批量写入模式：进入时删除普通索引，退出时重建
+        
+        写入过程中不再逐行维护这些索引，重建时一次性排序生成。
+        需要在事务中使用，写入失败回滚时删除的索引会一并恢复。
+        """
+        for index_name in _DEFERRABLE_INDEXES:
+            conn.execute(f"DROP INDEX IF EXISTS {index_name}")
+        yield
+        # 写入失败时直接抛出，由调用方回滚事务恢复索引
+        for index_sql in _DEFERRABLE_INDEXES.values():
+            conn.execute(index_sql)
+    
+    def _check_foreign_keys(self, conn: sqlite3.Connection):
+        """
+        校验引用 videos 的子表中没有悬空外键，有则抛出 IntegrityError
+        
+        用于关闭 foreign_keys 后的批量写入，需在提交前调用，失败时由调用方回滚。
+        """
+        for table in _FK_CHILD_TABLES:
+            violation = conn.execute(f"PRAGMA foreign_key_check({table})").fetchone()
+            if violation:
+                # WITHOUT ROWID 表的 rowid 列为 NULL，这里只报告表名
+                raise sqlite3.IntegrityError(f"外键校验失败: {table} 中存在引用 {violation[2]} 中不存在记录的行")
+    
+    def _select_existing_aids(self, conn: sqlite3.Connection, sql_template: str,
+                              prefix_params: Tuple, aids: List[int]) -> Set[int]:
+        """按块执行 IN 查询，返回其中已存在的AID集合"""
+        found = set()
+        for start in range(0, len(aids), _IN_CHUNK_SIZE):
+            chunk = aids[start:start + _IN_CHUNK_SIZE]
+            sql = sql_template.format(', '.join('?' * len(chunk)))
+            found.update(row[0] for row in conn.execute(sql, (*prefix_params, *chunk)))
+        return found
+    
     def save_video_data(self, conn: sqlite3.Connection, video_data: Dict) -> bool:
         """保存视频数据到数据库（如果不存在则插入）"""
         try:
@@ -224,71 +626,18 @@ class BilibiliLikesSpider:
             if self.video_exists(conn, video_data['aid']):
                 return True
             
+            video_row, stat_row, dim_row = _video_rows(video_data)
+            
             # 插入视频基本信息
-            cursor.execute('''
-            INSERT OR IGNORE INTO videos (
-                aid, bvid, title, duration, pubdate, ctime, tid, tname, desc, pic,
-                owner_mid, owner_name, copyright, state, pub_location, short_link,
-                first_frame, subtitle, resource_type, enable_vt
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                video_data['aid'],
-                video_data.get('bvid', ''),
-                video_data.get('title', ''),
-                video_data.get('duration', 0),
-                video_data.get('pubdate', 0),
-                video_data.get('ctime', 0),
-                video_data.get('tid', 0),
-                video_data.get('tname', ''),
-                video_data.get('desc', '')[:500],  # 限制描述长度
-                video_data.get('pic', ''),
-                video_data['owner']['mid'] if 'owner' in video_data else 0,
-                video_data['owner']['name'] if 'owner' in video_data else '',
-                video_data.get('copyright', 0),
-                video_data.get('state', 0),
-                video_data.get('pub_location', ''),
-                video_data.get('short_link_v2', ''),
-                video_data.get('first_frame', ''),
-                video_data.get('subtitle', ''),
-                video_data.get('resource_type', ''),
-                video_data.get('enable_vt', 0)
-            ))
+            cursor.execute(_SQL_INSERT_VIDEO, video_row)
             
             # 插入视频统计数据
-            if 'stat' in video_data:
-                stat = video_data['stat']
-                cursor.execute('''
-                INSERT INTO video_stats (
-                    aid, view, danmaku, reply, favorite, coin, share,
-                    like_count, now_rank, his_rank, vt, vv
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    video_data['aid'],
-                    stat.get('view', 0),
-                    stat.get('danmaku', 0),
-                    stat.get('reply', 0),
-                    stat.get('favorite', 0),
-                    stat.get('coin', 0),
-                    stat.get('share', 0),
-                    stat.get('like', 0),  # API返回的是like，不是like_count
-                    stat.get('now_rank', 0),
-                    stat.get('his_rank', 0),
-                    stat.get('vt', 0),
-                    stat.get('vv', 0)
-                ))
+            if stat_row:
+                cursor.execute(_SQL_INSERT_STAT, stat_row)
             
             # 插入维度信息
-            if 'dimension' in video_data:
-                dim = video_data['dimension']
-                cursor.execute('''
-                INSERT OR REPLACE INTO video_dimension (aid, width, height, rotate)
-                VALUES (?, ?, ?, ?)
-                ''', (
-                    video_data['aid'],
-                    dim.get('width', 0),
-                    dim.get('height', 0),
-                    dim.get('rotate', 0)
-                ))
+            if dim_row:
+                cursor.execute(_SQL_UPSERT_DIM, dim_row)
             
             return True
             
@@ -300,10 +649,7 @@ class BilibiliLikesSpider:
         """保存用户点赞关系"""
         try:
             cursor = conn.cursor()
-            cursor.execute('''
-            INSERT OR IGNORE INTO user_likes (user_mid, aid)
-            VALUES (?, ?)
-            ''', (user_mid, aid))
+            cursor.execute(_SQL_INSERT_LIKE, (user_mid, aid))
             return True
         except Exception as e:
             logger.error(f"保存用户点赞关系失败: {e}")
@@ -312,13 +658,15 @@ class BilibiliLikesSpider:
     def log_update(self, conn: sqlite3.Connection, user_mid: int, 
                    total_fetched: int, status: str = 'success', 
                    error_msg: str = None):
-        """记录更新日志"""
+        """
+        记录更新日志
+        
+        不自行提交：在调用方的事务中执行时随该事务一起提交；
+        在事务外（conn 处于自动提交）执行时本身就是一次提交
+        """
         try:
             cursor = conn.cursor()
-            cursor.execute('''
-            INSERT INTO update_log (user_mid, total_fetched, status, error_msg)
-            VALUES (?, ?, ?, ?)
-            ''', (user_mid, total_fetched, status, error_msg))
+            cursor.execute(_SQL_INSERT_LOG, (user_mid, total_fetched, status, error_msg))
         except Exception as e:
             logger.error(f"记录更新日志失败: {e}")
     
@@ -337,14 +685,48 @@ class BilibiliLikesSpider:
         # 获取点赞视频列表
         videos = self.fetch_user_likes(user_mid)
         
+        return self._store_user_likes(user_mid, videos)
+    
+    def update_many_users(self, user_mids: List[int], max_workers: int = 8) -> Dict[int, Tuple[bool, str]]:
+        """
+        批量更新多个用户的点赞视频
+        
+        HTTP请求在线程池中并发进行；SQLite只允许单个写入者，
+        因此由调用线程按请求完成的顺序逐个用户写入数据库
+        
+        Args:
+            user_mids: 用户MID列表
+            max_workers: 并发请求的线程数
+            
+        Returns:
+            {用户MID: (是否成功, 消息)}
+        """
+        results = {}
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            futures = {pool.submit(self.fetch_user_likes, mid): mid for mid in dict.fromkeys(user_mids)}
+            for future in as_completed(futures):
+                user_mid = futures[future]
+                logger.info(f"开始更新用户 {user_mid} 的点赞视频...")
+                results[user_mid] = self._store_user_likes(user_mid, future.result())
+        return results
+    
+    def _store_user_likes(self, user_mid: int, videos: Optional[List[Dict]]) -> Tuple[bool, str]:
+        """
+        将获取到的点赞视频写入数据库
+        
+        Args:
+            user_mid: 用户MID
+            videos: fetch_user_likes 的返回值
+            
+        Returns:
+            (是否成功, 消息)
+        """
         if videos is None:
             error_msg = "获取数据失败"
             logger.error(error_msg)
             
             # 记录失败日志
-            conn = sqlite3.connect(self.db_path)
-            self.log_update(conn, user_mid, 0, 'failed', error_msg)
-            conn.close()
+            self.log_update(self.conn, user_mid, 0, 'failed', error_msg)
             
             return False, error_msg
         
@@ -352,35 +734,90 @@ class BilibiliLikesSpider:
             logger.info(f"用户 {user_mid} 没有点赞视频")
             
             # 记录成功日志（无数据）
-            conn = sqlite3.connect(self.db_path)
-            self.log_update(conn, user_mid, 0, 'success', 'no videos')
-            conn.close()
+            self.log_update(self.conn, user_mid, 0, 'success', 'no videos')
             
             return True, "没有点赞视频"
         
-        conn = sqlite3.connect(self.db_path)
-        conn.execute("PRAGMA foreign_keys = ON")
+        conn = self.conn
+        defer_fk = False
         
         try:
             saved_count = 0
-            new_count = 0
+            
+            # 一次性查出已存在的视频和点赞关系，循环中只做集合判断；
+            # 在开启事务之前完成，才能按实际新增的行数决定是否关闭外键检查。
+            # 查询与 BEGIN 之间若有其他连接写入了同样的视频或点赞，视频、统计和点赞的插入语句
+            # 都会跳过冲突的行（统计在不同秒写入时会多出一条采集记录），维度信息按最新数据更新
+            aids = [video['aid'] for video in videos]
+            existing_videos = self._select_existing_aids(conn, _SQL_EXISTING_VIDEOS, (), aids)
+            if _SQL_INSERT_LIKE_RETURNING and len(videos) * 2 <= _BULK_INSERT_THRESHOLD:
+                # 已有的点赞关系由插入时的冲突处理跳过，这里只用于批内去重；
+                # 此时视频行和点赞行合计也不会超过阈值，不会误入批量写入模式。
+                # 批次更大时仍需查出已有关系，才能按实际新增的行数决定是否进入批量写入模式
+                existing_likes = set()
+            else:
+                existing_likes = self._select_existing_aids(conn, _SQL_EXISTING_LIKES, (user_mid,), aids)
+            
+            # 先把所有待写入的行收集起来，再按表各用一次 executemany 批量写入
+            video_rows, stat_rows, dim_rows, like_rows = [], [], [], []
             
             for video in videos:
-                # 保存视频数据
-                if self.save_video_data(conn, video):
-                    saved_count += 1
-                    
-                    # 检查是否为新的点赞关系
-                    if not self.user_like_exists(conn, user_mid, video['aid']):
-                        new_count += 1
+                aid = video['aid']
+                
+                # 已存在的视频不再重复写入
+                if aid not in existing_videos:
+                    try:
+                        video_row, stat_row, dim_row = _video_rows(video)
+                    except Exception as e:
+                        logger.error(f"保存视频数据失败 (aid={video.get('aid', 'N/A')}): {e}")
+                        continue
                     
-                    # 保存用户点赞关系
-                    self.save_user_like(conn, user_mid, video['aid'])
+                    video_rows.append(video_row)
+                    if stat_row:
+                        stat_rows.append(stat_row)
+                    if dim_row:
+                        dim_rows.append(dim_row)
+                    existing_videos.add(aid)
+                
+                saved_count += 1
+                
+                # 检查是否为新的点赞关系
+                if aid not in existing_likes:
+                    existing_likes.add(aid)
+                    like_rows.append((user_mid, aid))
+            
+            # 新增的子表行较多时关闭逐行外键检查，提交前对子表统一校验一次
+            # （该 PRAGMA 在事务内不生效，必须在 BEGIN 之前设置）
+            defer_fk = len(stat_rows) + len(dim_rows) > _BULK_INSERT_THRESHOLD
+            if defer_fk:
+                conn.execute("PRAGMA foreign_keys = OFF")
+            
+            # 所有视频、点赞关系和更新日志在同一个事务中写入，只提交一次
+            conn.execute("BEGIN IMMEDIATE")
+            
+            # 按实际要写入的行数判断，已入库的视频和点赞不计入，
+            # 避免日常轮询只新增几条时也重建整张表的索引
+            bulk = len(video_rows) + len(like_rows) > _BULK_INSERT_THRESHOLD
+            
+            cursor = conn.cursor()
+            bulk_mode = self._bulk_insert_mode(conn) if bulk else contextlib.nullcontext()
+            with bulk_mode:
+                _insert_rows(cursor, _SQL_INSERT_VIDEO, video_rows)
+                _insert_rows(cursor, _SQL_INSERT_STAT, stat_rows)
+                _insert_rows(cursor, _SQL_UPSERT_DIM, dim_rows)
+                if _SQL_INSERT_LIKE_RETURNING:
+                    new_count = _insert_rows_returning(cursor, _SQL_INSERT_LIKE_RETURNING, like_rows)
+                else:
+                    _insert_rows(cursor, _SQL_INSERT_LIKE, like_rows)
+                    new_count = len(like_rows)
+            
+            if defer_fk:
+                self._check_foreign_keys(conn)
             
-            # 记录更新日志
+            # 记录更新日志（与本批数据同一事务，整次更新只提交一次）
             self.log_update(conn, user_mid, len(videos), 'success')
             
-            conn.commit()
+            conn.execute("COMMIT")
             
             msg = f"更新完成: 获取{len(videos)}个视频，保存{saved_count}个，新增{new_count}个点赞"
             logger.info(msg)
@@ -388,53 +825,35 @@ class BilibiliLikesSpider:
             return True, msg
             
         except Exception as e:
-            conn.rollback()
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
             error_msg = f"数据库操作失败: {e}"
             logger.error(error_msg)
             self.log_update(conn, user_mid, 0, 'failed', error_msg)
             return False, error_msg
-            
         finally:
-            conn.close()
+            if defer_fk:
+                conn.execute("PRAGMA foreign_keys = ON")
     
     def get_statistics(self, user_mid: int = None) -> Dict:
-        """获取统计信息"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        """获取统计信息（所有统计项合并为一条查询）"""
+        sql, params = _SQL_STATISTICS, ()
         
-        stats = {}
+        # 用户特定统计
+        if user_mid:
+            sql, params = _SQL_USER_STATISTICS, (user_mid, user_mid)
         
-        try:
-            # 总视频数
-            cursor.execute("SELECT COUNT(*) FROM videos")
-            stats['total_videos'] = cursor.fetchone()[0]
-            
-            # 总点赞记录数
-            cursor.execute("SELECT COUNT(*) FROM user_likes")
-            stats['total_likes'] = cursor.fetchone()[0]
-            
-            # 不同用户数
-            cursor.execute("SELECT COUNT(DISTINCT user_mid) FROM user_likes")
-            stats['unique_users'] = cursor.fetchone()[0]
-            
-            # 最近更新时间
-            cursor.execute("SELECT MAX(last_update) FROM update_log WHERE status = 'success'")
-            stats['last_update'] = cursor.fetchone()[0]
-            
-            # 用户特定统计
-            if user_mid:
-                cursor.execute("SELECT COUNT(*) FROM user_likes WHERE user_mid = ?", (user_mid,))
-                stats['user_likes'] = cursor.fetchone()[0]
-                
-                cursor.execute(
-                    "SELECT last_update FROM update_log WHERE user_mid = ? ORDER BY id DESC LIMIT 1",
-                    (user_mid,)
-                )
-                result = cursor.fetchone()
-                stats['user_last_update'] = result[0] if result else None
+        row = self.conn.execute(sql, params).fetchone()
         
-        finally:
-            conn.close()
+        stats = {
+            'total_videos': row[0],
+            'total_likes': row[1],
+            'unique_users': row[2],
+            'last_update': row[3],
+        }
+        if user_mid:
+            stats['user_likes'] = row[4]
+            stats['user_last_update'] = row[5]
         
         return stats
     
@@ -454,16 +873,11 @@ class BilibiliLikesSpider:
             logger.info(f"定时任务结束: {'成功' if success else '失败'} - {msg}")
             logger.info("=== 定时任务结束 ===\n")
         
-        # 立即运行一次
-        job()
-        
-        # 设置定时任务
-        schedule.every(interval_hours).hours.do(job)
-        
         try:
+            # 立即运行一次，之后每次任务结束后休眠一个间隔
             while True:
-                schedule.run_pending()
-                time.sleep(60)  # 每分钟检查一次
+                job()
+                time.sleep(interval_hours * 3600)
         except KeyboardInterrupt:
             logger.info("程序被用户中断")
         except Exception as e:
@@ -485,33 +899,36 @@ def main():
     # 创建爬虫实例
     spider = BilibiliLikesSpider(db_path=args.db, sessdata=args.sessdata)
     
-    # 显示统计信息
-    if args.stats:
-        stats = spider.get_statistics(args.mid)
-        print("\n=== 数据库统计信息 ===")
-        print(f"总视频数: {stats.get('total_videos', 0)}")
-        print(f"总点赞记录数: {stats.get('total_likes', 0)}")
-        print(f"不同用户数: {stats.get('unique_users', 0)}")
-        print(f"最近更新时间: {stats.get('last_update', 'N/A')}")
-        
-        if 'user_likes' in stats:
-            print(f"\n用户 {args.mid} 统计:")
-            print(f"  点赞视频数: {stats['user_likes']}")
-            print(f"  最后更新: {stats.get('user_last_update', 'N/A')}")
-        return
-    
-    # 运行爬虫
-    if args.once:
-        # 单次运行
-        success, msg = spider.update_user_likes(args.mid)
-        if success:
-            print(f"✓ 更新成功: {msg}")
+    try:
+        # 显示统计信息
+        if args.stats:
+            stats = spider.get_statistics(args.mid)
+            print("\n=== 数据库统计信息 ===")
+            print(f"总视频数: {stats.get('total_videos', 0)}")
+            print(f"总点赞记录数: {stats.get('total_likes', 0)}")
+            print(f"不同用户数: {stats.get('unique_users', 0)}")
+            print(f"最近更新时间: {stats.get('last_update', 'N/A')}")
+        
+            if 'user_likes' in stats:
+                print(f"\n用户 {args.mid} 统计:")
+                print(f"  点赞视频数: {stats['user_likes']}")
+                print(f"  最后更新: {stats.get('user_last_update', 'N/A')}")
+            return
+        
+        # 运行爬虫
+        if args.once:
+            # 单次运行
+            success, msg = spider.update_user_likes(args.mid)
+            if success:
+                print(f"✓ 更新成功: {msg}")
+            else:
+                print(f"✗ 更新失败: {msg}")
+                sys.exit(1)
         else:
-            print(f"✗ 更新失败: {msg}")
-            sys.exit(1)
-    else:
-        # 定时运行
-        spider.run_scheduled(args.mid, args.interval)
+            # 定时运行
+            spider.run_scheduled(args.mid, args.interval)
+    finally:
+        spider.close()
 
 
 if __name__ == "__main__":